@@ -1,2 +1,31 @@
-from .checking import CheckingImporter  # NOQA
-from .credit import CreditImporter  # NOQA
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from .checking import CheckingImporter  # NOQA
+    from .credit import CreditImporter  # NOQA
+
+# The importers, by the submodule that defines them. Submodules are imported on
+# first access, so that bean tools only pay for what a config uses.
+_LAZY_ATTRIBUTES = {
+    'CheckingImporter': 'checking',
+    'CreditImporter': 'credit',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}') from None
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    # Later lookups find the attribute without calling __getattr__.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,83 @@
+import itertools
+import threading
+
+# Number of directives an executor job extracts before handing control back.
+DEFAULT_CHUNK_SIZE = 1000
+
+
+async def chunks(iterator, chunk_size=DEFAULT_CHUNK_SIZE, executor=None):
+    """Advance a blocking iterator in an executor, one chunk at a time.
+
+    The next chunk is only read once the consumer asks for it, so a slow
+    consumer holds at most one chunk in memory. Each chunk is a separate
+    executor job, so many iterators sharing an executor take turns rather
+    than one of them occupying a worker until it is exhausted.
+
+    If the consumer stops early or is cancelled, the iterator is closed. A
+    chunk that is being read when that happens is finished first, because a
+    worker thread cannot be interrupted.
+
+    Args:
+        iterator: The iterator to advance. It must be safe to advance from
+            any thread, as generators are, and is closed if it has a close()
+            method.
+        chunk_size: Maximum number of items per chunk.
+        executor: The concurrent.futures.Executor to read chunks in. Defaults
+            to the event loop's default executor.
+
+    Yields:
+        Non-empty lists of the iterator's items.
+    """
+    # An event loop is running, so asyncio is already imported. Importing it
+    # here keeps importing the importers cheap for code that never uses it.
+    import asyncio  # pylint: disable=import-outside-toplevel
+    loop = asyncio.get_running_loop()
+    reader = _ChunkReader(iterator, chunk_size)
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, reader.read)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        reader.close()
+
+
+class _ChunkReader:
+    """Reads chunks of an iterator and closes it once no read is running."""
+
+    def __init__(self, iterator, chunk_size):
+        self._iterator = iterator
+        self._chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._reading = False
+        self._closed = False
+
+    def read(self):
+        with self._lock:
+            if self._closed:
+                return []
+            self._reading = True
+        try:
+            return list(itertools.islice(self._iterator, self._chunk_size))
+        finally:
+            with self._lock:
+                self._reading = False
+                closed = self._closed
+            if closed:
+                self._close_iterator()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._reading:
+                # The running read() closes the iterator when it finishes.
+                return
+        self._close_iterator()
+
+    def _close_iterator(self):
+        close = getattr(self._iterator, 'close', None)
+        if close is not None:
+            close()
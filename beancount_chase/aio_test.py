@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+from . import aio
+
+
+def _collect(iterator, chunk_size):
+
+    async def collect():
+        return [chunk async for chunk in aio.chunks(iterator, chunk_size)]
+
+    return asyncio.run(collect())
+
+
+def test_chunks_yields_items_in_bounded_lists():
+    assert [[0, 1], [2, 3], [4]] == _collect(iter(range(5)), 2)
+
+
+def test_chunks_closes_iterator_when_consumer_stops():
+    closed = []
+
+    def generate():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    async def take_first():
+        chunks = aio.chunks(generate(), chunk_size=2)
+        async for chunk in chunks:
+            await chunks.aclose()
+            return chunk
+        return None
+
+    assert [0, 1] == asyncio.run(take_first())
+    assert [True] == closed
+
+
+def test_chunks_closes_iterator_after_cancelled_read_finishes():
+    reading = threading.Event()
+    resume = threading.Event()
+    closed = threading.Event()
+
+    def generate():
+        try:
+            reading.set()
+            resume.wait()
+            yield 1
+        finally:
+            closed.set()
+
+    async def cancel_while_reading():
+        task = asyncio.create_task(_first_chunk(generate()))
+        await asyncio.get_running_loop().run_in_executor(None, reading.wait)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert not closed.is_set()
+        resume.set()
+        await asyncio.get_running_loop().run_in_executor(None, closed.wait)
+
+    asyncio.run(cancel_while_reading())
+    assert closed.is_set()
+
+
+async def _first_chunk(iterator):
+    async for chunk in aio.chunks(iterator):
+        return chunk
+    return None
@@ -0,0 +1,114 @@
+import datetime
+
+from beancount.core import amount
+from beancount.core import data
+
+from . import parsing
+
+# Assert the balance at the end of every day that has transactions.
+DAILY = 'daily'
+# Assert only the balance after the newest transaction of a file.
+FILE_END = 'file'
+
+_MODES = (DAILY, FILE_END)
+
+_ONE_DAY = datetime.timedelta(days=1)
+
+
+class BalanceTracker:
+    """Builds balance assertions from a running balance column.
+
+    Rows are fed in file order, which Chase makes newest first. Whether a
+    file is newest first or oldest first is decided from the first change of
+    date, so a day's closing balance is taken from its first row in a
+    newest-first file and from its last row otherwise. A file with a single
+    date is assumed to be newest first.
+
+    Beancount checks a balance assertion before the transactions of its date,
+    so the closing balance of a day is asserted on the following day.
+    """
+
+    def __init__(self, account, currency, mode):
+        """Start tracking a file's balances.
+
+        Args:
+            account: The account whose balance the column holds.
+            currency: The currency of the balances.
+            mode: DAILY or FILE_END.
+        """
+        if mode not in _MODES:
+            raise ValueError(
+                f'invalid balances mode: {mode!r}, expected one of {_MODES}')
+        self._account = account
+        self._currency = currency
+        self._daily = mode == DAILY
+        self._newest_first = None
+        # The day being read, and its first and last rows' balances with
+        # their metadata.
+        self._day = None
+        self._first = None
+        self._last = None
+        # The newest closing balance seen, for FILE_END mode.
+        self._newest = None
+
+    def add(self, date, balance_raw, meta):
+        """Record the running balance after a row.
+
+        Args:
+            date: The row's posting date.
+            balance_raw: The row's raw balance string. Blank balances are
+                ignored.
+            meta: The row's metadata.
+
+        Returns:
+            The balance assertions of any days that this row completes.
+
+        Raises:
+            ValueError: If the rows are not sorted by date.
+        """
+        if not balance_raw or not balance_raw.strip():
+            return []
+        if date == self._day:
+            self._last = (balance_raw, meta)
+            return []
+
+        if self._day is not None:
+            newest_first = date < self._day
+            if self._newest_first is None:
+                self._newest_first = newest_first
+            elif newest_first != self._newest_first:
+                filename = meta['filename']
+                raise ValueError(f'cannot assert balances of {filename}: its '
+                                 'rows are not sorted by date')
+        completed = self._complete_day()
+        self._day = date
+        self._first = self._last = (balance_raw, meta)
+        return completed
+
+    def finish(self):
+        """Returns the balance assertions still due once every row is added."""
+        completed = self._complete_day()
+        if self._daily or self._newest is None:
+            return completed
+        return [self._newest]
+
+    def _complete_day(self):
+        if self._day is None:
+            return []
+        balance_raw, meta = (self._last
+                             if self._newest_first is False else self._first)
+        balance = data.Balance(meta=data.new_metadata(meta['filename'],
+                                                      meta['lineno']),
+                               date=self._day + _ONE_DAY,
+                               account=self._account,
+                               amount=amount.Amount(
+                                   parsing.parse_number(balance_raw),
+                                   self._currency),
+                               tolerance=None,
+                               diff_amount=None)
+        self._day = None
+        if self._daily:
+            return [balance]
+        if self._newest is None or balance.date > self._newest.date:
+            self._newest = balance
+        return []
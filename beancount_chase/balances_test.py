@@ -0,0 +1,62 @@
+import datetime
+
+import pytest
+
+from . import balances
+
+
+def _track(mode, rows):
+    tracker = balances.BalanceTracker('Assets:Checking', 'USD', mode)
+    directives = []
+    for lineno, (date, balance) in enumerate(rows):
+        directives.extend(
+            tracker.add(datetime.date.fromisoformat(date), balance, {
+                'filename': 'export.csv',
+                'lineno': lineno
+            }))
+    directives.extend(tracker.finish())
+    return [(d.date.isoformat(), str(d.amount), d.meta['lineno'])
+            for d in directives]
+
+
+def test_asserts_closing_balance_of_each_day_newest_first():
+    assert [
+        ('2024-01-04', '90.00 USD', 0),
+        ('2024-01-03', '120.00 USD', 2),
+    ] == _track(balances.DAILY, [('2024-01-03', '90.00'),
+                                 ('2024-01-03', '100.00'),
+                                 ('2024-01-02', '120.00')])
+
+
+def test_asserts_closing_balance_of_each_day_oldest_first():
+    assert [
+        ('2024-01-03', '120.00 USD', 0),
+        ('2024-01-04', '90.00 USD', 2),
+    ] == _track(balances.DAILY, [('2024-01-02', '120.00'),
+                                 ('2024-01-03', '100.00'),
+                                 ('2024-01-03', '90.00')])
+
+
+def test_asserts_only_newest_balance_of_file():
+    rows = [('2024-01-03', '90.00'), ('2024-01-03', '100.00'),
+            ('2024-01-02', '120.00')]
+
+    assert [('2024-01-04', '90.00 USD', 0)] == _track(balances.FILE_END, rows)
+
+
+def test_ignores_blank_balances():
+    rows = [('2024-01-03', ' '), ('2024-01-03', '100.00')]
+
+    assert [('2024-01-04', '100.00 USD', 1)] == _track(balances.FILE_END, rows)
+
+
+def test_rejects_unsorted_rows():
+    with pytest.raises(ValueError):
+        _track(balances.DAILY, [('2024-01-03', '90.00'),
+                                ('2024-01-02', '100.00'),
+                                ('2024-01-04', '120.00')])
+
+
+def test_rejects_invalid_mode():
+    with pytest.raises(ValueError):
+        balances.BalanceTracker('Assets:Checking', 'USD', 'weekly')
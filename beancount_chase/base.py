@@ -0,0 +1,457 @@
+import itertools
+import operator
+import os
+
+from beancount.core import amount
+from beancount.core import data
+from beancount.core import flags
+from beancount.ingest import importer
+
+from . import aio
+from . import cache
+from . import columns
+from . import instrumentation
+from . import parsing
+from . import rules
+from . import sources
+
+# Number of directives, across all files, that each importer keeps in memory.
+# The bound is on directives rather than files so that a long-lived importer,
+# such as a watcher's, holds a few large exports or many small ones.
+_EXTRACTION_CACHE_DIRECTIVES = 50_000
+
+# Number of rows that columnar extraction parses at a time, which bounds the
+# memory it holds beyond that of the rows' transactions.
+_COLUMNAR_CHUNK_ROWS = 4096
+
+_MISSING = object()
+
+
+class ChaseImporter(importer.ImporterProtocol):
+    """Plumbing shared by the Chase CSV importers.
+
+    Subclasses describe their export format with the class attributes below,
+    and turn a CSV row's description columns into its payee, narration and
+    balancing account in _row_details() and _other_account().
+    """
+
+    # Matches the export's filename, with the account's last four digits as
+    # the first group.
+    _filename_pattern = None
+    # The sniff format of the exports.
+    _format = None
+    # A namedtuple of the names of the columns that extraction reads, which is
+    # also the type of the row records. It must have 'date' and 'amount'
+    # fields.
+    _row_columns = None
+    # A namedtuple of the functions that make up the extraction pipeline,
+    # which instrumentation replaces with the timed versions that
+    # _instrument_stages() returns.
+    _stage_table = None
+    # Fields of the row records whose raw values tell rows apart for
+    # watermarks.WatermarkStore.
+    _fingerprint_fields = ()
+    # Fields of the row records whose columns an export may lack. They read
+    # as None in exports without them.
+    _optional_fields = ()
+    # Fields of the row records that _row_details() reads, and those that
+    # _other_account() reads besides the payee and narration. Columnar
+    # extraction calls each once per distinct combination of its inputs.
+    _detail_fields = ()
+    _account_fields = ()
+
+    def __init__(self,
+                 account,
+                 lastfour=None,
+                 currency='USD',
+                 account_patterns=None,
+                 title_case=True,
+                 instrument=False,
+                 *,
+                 watermarks=None,
+                 columnar=False,
+                 cache_dir=None):
+        self._account = account
+        self._last_four_account_digits = lastfour
+        self._currency = currency
+        if not isinstance(account_patterns, rules.RuleSet):
+            account_patterns = rules.RuleSet(account_patterns or [])
+        self._account_matcher = account_patterns
+        self._title_case = title_case
+        self._extraction_cache = cache.TieredCache(_EXTRACTION_CACHE_DIRECTIVES,
+                                                   cache_dir,
+                                                   sizeof=len)
+        # Per-stage timings and match counters, or None if not instrumenting.
+        self.stats = instrumentation.Stats() if instrument else None
+        self._stages = self._build_stages(self.stats)
+        self._watermarks = watermarks
+        self._columnar = columnar
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The stages are bound methods and closures, which do not pickle, so
+        # an importer sent to a worker process rebuilds them instead.
+        del state['_stages']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stages = self._build_stages(self.stats)
+
+    def file_date(self, file):
+        source = sources.resolve(file)
+        # Only directives already in memory are cheaper than a scan; loading
+        # them from disk would unpickle every one just to take a date.
+        directives = self._extraction_cache.memory.get(self._cache_key(source))
+        if directives is not None:
+            # Balance assertions are dated after their rows, so skip them.
+            transaction_dates = [
+                x.date for x in directives if isinstance(x, data.Transaction)  # pylint: disable=isinstance-second-argument-not-valid-type
+            ]
+            return max(transaction_dates, default=None)
+        return self.date_range(source)[1]
+
+    def date_range(self, file):
+        """Find the dates spanned by the transactions of an export cheaply.
+
+        Args:
+            file: The export, as any type that extract() accepts.
+
+        Returns:
+            A tuple of the earliest and latest dates among rows with a
+            non-zero amount, or (None, None) if there are no such rows.
+        """
+        summary = sources.resolve(file).summarize(self._row_columns.date,
+                                                  self._row_columns.amount)
+        return summary.first_date, summary.last_date
+
+    def file_account(self, _):
+        return self._account
+
+    def identify(self, file):
+        source = sources.resolve(file)
+        match = self._filename_pattern.match(os.path.basename(source.name))
+        if not match or self._last_four_account_digits != match.group(1):
+            return False
+        # The filename does not tell checking and credit card exports apart,
+        # so check the header too rather than fail while extracting.
+        return source.detect_format() == self._format
+
+    def extract(self, f):
+        """Extract a Chase export's directives.
+
+        Args:
+            f: The export, either on disk or in memory. See sources.resolve()
+                for the accepted types.
+
+        Returns:
+            A list of directives.
+        """
+        return list(self._extract_cached(sources.resolve(f)))
+
+    def extract_iter(self, f):
+        """Yields transactions from a Chase CSV as its rows are parsed.
+
+        Unlike extract(), this never holds the whole file's transactions in
+        memory unless they were already cached by an earlier extract() call.
+        """
+        source = sources.resolve(f)
+        if self._watermarks is None:
+            transactions = self._extraction_cache.get(self._cache_key(source))
+            if transactions is not None:
+                yield from transactions
+                return
+        yield from self._extract_file(source)
+
+    async def extract_async(self,
+                            f,
+                            executor=None,
+                            chunk_size=aio.DEFAULT_CHUNK_SIZE):
+        """Like extract(), but parses in an executor a chunk at a time.
+
+        Args:
+            f: The file to extract from.
+            executor: The concurrent.futures.Executor to parse in. Defaults
+                to the event loop's default executor.
+            chunk_size: Number of directives each executor job extracts.
+
+        Returns:
+            The same list of directives as extract().
+        """
+        directives = []
+        async for chunk in aio.chunks(self._extract_cached(sources.resolve(f)),
+                                      chunk_size, executor):
+            directives.extend(chunk)
+        return directives
+
+    async def extract_aiter(self,
+                            f,
+                            executor=None,
+                            chunk_size=aio.DEFAULT_CHUNK_SIZE):
+        """Like extract_iter(), but parses in an executor a chunk at a time.
+
+        The next chunk is only parsed once the previous one has been
+        consumed, and parsing stops when the iteration is cancelled or
+        closed.
+
+        Args:
+            f: The file to extract from.
+            executor: The concurrent.futures.Executor to parse in. Defaults
+                to the event loop's default executor.
+            chunk_size: Number of directives each executor job extracts.
+
+        Yields:
+            The same directives as extract_iter().
+        """
+        async for chunk in aio.chunks(self.extract_iter(f), chunk_size,
+                                      executor):
+            for directive in chunk:
+                yield directive
+
+    def _extract_cached(self, source):
+        """Yields a file's directives, caching them once all are extracted."""
+        if self._watermarks is not None:
+            # Which rows are new depends on the store, not just the file.
+            yield from self._extract_file(source)
+            return
+
+        key = self._cache_key(source)
+        directives = self._extraction_cache.get(key)
+        if directives is not None:
+            yield from directives
+            return
+        extracted = []
+        for directive in self._extract_file(source):
+            extracted.append(directive)
+            yield directive
+        self._extraction_cache.put(key, tuple(extracted))
+
+    def _cache_key(self, source):
+        """Build the extraction cache key of a file.
+
+        The key covers the file's path and contents and every setting that
+        changes what is extracted from it, so that directives cached on disk
+        are not reused after the settings change.
+        """
+        return (*source.cache_key(), self._settings())
+
+    def _settings(self):
+        """Returns the settings that change what is extracted from a file."""
+        return (type(self).__name__, self._account, self._currency,
+                self._title_case, self._account_matcher.rules)
+
+    def _build_stages(self, stats):
+        """Returns the extraction stages, timed by stats if it is not None."""
+        if stats is None:
+            return self._stage_table
+        return self._instrument_stages(stats, self._account_matcher)
+
+    @staticmethod
+    def _instrument_stages(stats, account_matcher):
+        """Returns the stages of _stage_table, timed and counted by stats."""
+        raise NotImplementedError
+
+    def _row_details(self, row):
+        """Returns the (payee, narration) of a CSV row.
+
+        Raises:
+            ValueError: If the row cannot be parsed.
+        """
+        raise NotImplementedError
+
+    def _other_account(self, row, payee, narration):
+        """Returns the account that balances a row, or None if unknown."""
+        raise NotImplementedError
+
+    def _extract_transaction_from_row(self, row, metadata, parse_date):
+        """Returns the transaction for a CSV row, or None to skip the row."""
+        transaction_date = parse_date(row.date)
+        details = self._row_details(row)
+        transaction_amount = self._parse_amount(row.amount)
+        if transaction_amount is None:
+            return None  # 0 dollar transaction
+        other_account = self._other_account(row, *details)
+        return self._new_transaction(
+            metadata, transaction_date, details,
+            self._new_postings(transaction_amount, other_account))
+
+    def _new_transaction(self, metadata, date, details, postings):
+        payee, narration = details
+        return self._stages.new_transaction(
+            meta=metadata,
+            date=date,
+            flag=flags.FLAG_OKAY,
+            payee=payee,
+            narration=narration,
+            tags=data.EMPTY_SET,
+            links=data.EMPTY_SET,
+            postings=postings,
+        )
+
+    def _extract_file(self, source):
+        with source.open() as csv_file:
+            rows = columns.read_records(csv_file, self._row_columns,
+                                        self._optional_fields)
+            parse_date = parsing.DateParser().parse
+            if self.stats is not None:
+                rows = self.stats.timed_iter('read_csv', rows)
+                parse_date = self.stats.timed('parse_date', parse_date)
+            indexed_rows = enumerate(rows)
+            if self._watermarks is not None:
+                indexed_rows = self._watermarks.new_rows(
+                    self._account, indexed_rows,
+                    self._row_fingerprinter(parse_date))
+            extract_rows = (self._extract_chunks
+                            if self._columnar else self._extract_rows)
+            yield from self._directives(
+                extract_rows(source.name, indexed_rows, parse_date))
+
+    def _extract_rows(self, filename, indexed_rows, parse_date):
+        """Yields a (row, transaction) pair per row that has a transaction."""
+        for index, row in indexed_rows:
+            metadata = data.new_metadata(filename, index)
+            transaction = self._extract_transaction_from_row(
+                row, metadata, parse_date)
+            if transaction:
+                yield row, transaction
+
+    def _extract_chunks(self, filename, indexed_rows, parse_date):
+        """Like _extract_rows(), but parses a chunk of rows at a time."""
+        indexed_rows = iter(indexed_rows)
+        while True:
+            chunk = list(itertools.islice(indexed_rows, _COLUMNAR_CHUNK_ROWS))
+            if not chunk:
+                return
+            try:
+                extracted = self._extract_chunk(filename, chunk, parse_date)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Row by row, the same error is raised at the same row, once
+                # the transactions of the rows before it have been yielded.
+                extracted = self._extract_rows(filename, chunk, parse_date)
+            yield from extracted
+
+    def _extract_chunk(self, filename, chunk, parse_date):
+        """Extract a chunk of (index, row) pairs a column at a time.
+
+        Dates and amounts are parsed once per distinct string, the details
+        once per distinct combination of _detail_fields, and the balancing
+        account once per distinct payee, narration and _account_fields, so
+        repeated descriptions cost dict lookups. The details of zero-amount
+        rows are parsed too, so that a row that cannot be parsed raises
+        whatever its amount.
+
+        Returns:
+            The list of (row, transaction) pairs that _extract_rows() yields.
+        """
+        details_key = operator.attrgetter(*self._detail_fields)
+        account_fields = _no_fields
+        if self._account_fields:
+            account_fields = operator.attrgetter(*self._account_fields)
+        details = {}
+        for _, row in chunk:
+            key = details_key(row)
+            if key not in details:
+                details[key] = self._row_details(row)
+        dates = {row.date: None for _, row in chunk}
+        for date_raw in dates:
+            dates[date_raw] = parse_date(date_raw)
+        amounts = {row.amount: None for _, row in chunk}
+        for amount_raw in amounts:
+            amounts[amount_raw] = _parse_units(amount_raw, self._currency)
+
+        other_accounts = {}
+        extracted = []
+        for index, row in chunk:
+            units = amounts[row.amount]
+            if units is None:
+                continue  # 0 dollar transaction
+            row_details = details[details_key(row)]
+            account_key = (row_details, account_fields(row))
+            other_account = other_accounts.get(account_key, _MISSING)
+            if other_account is _MISSING:
+                other_account = self._other_account(row, *row_details)
+                other_accounts[account_key] = other_account
+            transaction = self._new_transaction(
+                data.new_metadata(filename, index), dates[row.date],
+                row_details, self._new_postings(units, other_account))
+            extracted.append((row, transaction))
+        if self.stats is not None and len(extracted) < len(chunk):
+            self.stats.count('zero_amount_rows', len(chunk) - len(extracted))
+        return extracted
+
+    def _directives(self, extracted_rows):
+        """Turn (row, transaction) pairs into the directives to extract.
+
+        Subclasses override this to add directives derived from the rows.
+        """
+        for _, transaction in extracted_rows:
+            yield transaction
+
+    def _row_fingerprinter(self, parse_date):
+        """Returns the fingerprint function for watermarks.WatermarkStore."""
+        fields_of = operator.attrgetter(*self._fingerprint_fields)
+        return lambda row: (parse_date(row.date), fields_of(row))
+
+    def _parse_amount(self, raw_amount):
+        """Parse a row's amount, counting and dropping zero amounts.
+
+        Args:
+            raw_amount: The raw value of the row's amount column.
+
+        Returns:
+            An Amount in the importer's currency, or None if the amount is
+            empty or zero.
+        """
+        units = _parse_units(raw_amount, self._currency)
+        if units is None and self.stats is not None:
+            self.stats.count('zero_amount_rows')
+        return units
+
+    def _new_postings(self, units, other_account):
+        """Build a transaction's postings.
+
+        Args:
+            units: The Amount that moves through the importer's account.
+            other_account: The account that balances the transaction, or None
+                if it is unknown.
+
+        Returns:
+            A posting to the importer's account, balanced by a posting to
+            other_account if there is one.
+        """
+        postings = [
+            data.Posting(account=self._account,
+                         units=units,
+                         cost=None,
+                         price=None,
+                         flag=None,
+                         meta=None)
+        ]
+        if other_account is not None:
+            postings.append(
+                data.Posting(account=other_account,
+                             units=-units,
+                             cost=None,
+                             price=None,
+                             flag=None,
+                             meta=None))
+        return postings
+
+    def _rule_account(self, rule_index):
+        """Returns the account of an account_patterns rule, or None for None."""
+        if rule_index is None:
+            return None
+        return self._account_matcher.account(rule_index)
+
+
+def _no_fields(_):
+    return None
+
+
+def _parse_units(raw_amount, currency):
+    """Returns the Amount of a raw amount, or None if it is empty or zero."""
+    if raw_amount:
+        number = parsing.parse_number(raw_amount)
+        if number != parsing.ZERO:
+            return amount.Amount(number, currency)
+    return None
@@ -0,0 +1,82 @@
+import concurrent.futures
+import os
+
+from beancount.ingest import cache as ingest_cache
+
+# Importers configured in each worker process. They are sent to a worker once,
+# when the worker starts, so their rules are not recompiled for every file.
+_WORKER_STATE = {}
+
+
+def extract_files(files, importers, workers=None, mp_context=None):
+    """Identify and extract many Chase CSV files in parallel.
+
+    Args:
+        files: A directory path or a list of file paths. A directory's files
+            are processed in sorted order, and a list in the order given.
+        importers: Configured CheckingImporter and CreditImporter instances.
+            Every importer that identifies a file extracts it, as
+            bean-extract does.
+        workers: Number of worker processes. None uses one per CPU, and 1
+            extracts in the current process.
+        mp_context: The multiprocessing context to start workers with, such
+            as multiprocessing.get_context('spawn'). None uses the platform's
+            default start method. Unless workers are forked, the importers
+            are pickled to send them to the workers.
+
+    Returns:
+        A list of directives ordered by file and then by the row each
+        directive came from.
+    """
+    paths = _list_files(files)
+    if workers == 1:
+        results = (extract_file(path, importers) for path in paths)
+        return [directive for result in results for directive in result]
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(importers,)) as executor:
+        results = executor.map(_extract_path_in_worker, paths)
+        return [directive for result in results for directive in result]
+
+
+def _list_files(files):
+    if isinstance(files, (str, os.PathLike)):
+        with os.scandir(files) as entries:
+            paths = sorted(entry.path for entry in entries if entry.is_file())
+    else:
+        paths = [os.fspath(f) for f in files]
+    # bean-extract's file memos require absolute paths.
+    return [os.path.abspath(path) for path in paths]
+
+
+def _init_worker(importers):
+    _WORKER_STATE['importers'] = importers
+
+
+def _extract_path_in_worker(path):
+    return extract_file(path, _WORKER_STATE['importers'])
+
+
+def extract_file(path, importers):
+    """Identify and extract one Chase CSV file in the current process.
+
+    Args:
+        path: Absolute path of the file.
+        importers: Configured CheckingImporter and CreditImporter instances.
+            Every importer that identifies the file extracts it.
+
+    Returns:
+        A list of the file's directives ordered by the row each came from.
+    """
+    f = ingest_cache.get_file(path)
+    directives = []
+    for importer in importers:
+        if importer.identify(f):
+            directives.extend(importer.extract(f))
+    # Several importers may claim the same file, so interleave their
+    # directives by the row they came from.
+    directives.sort(key=lambda directive: directive.meta['lineno'])
+    return directives
@@ -0,0 +1,89 @@
+import multiprocessing
+import textwrap
+
+import pytest
+
+from . import CheckingImporter
+from . import CreditImporter
+from . import batch
+
+
+def _unindent(indented):
+    return textwrap.dedent(indented).lstrip()
+
+
+@pytest.fixture(name='downloads')
+def fixture_downloads(tmp_path):
+    (tmp_path / 'Chase1234_Activity_20211019.CSV').write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,09/14/2021,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,4310.75,,
+            DEBIT,09/13/2021,"Online Transfer 12345678901 to Schwab Personal Checking ########9876 transaction #: 12345678901 09/13",-2500.00,ACCT_XFER,4325.75,,
+            """))
+    (tmp_path / 'Chase5678_Activity20210103_20210202_20210214.CSV').write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            5678,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            5678,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    (tmp_path / 'notes.txt').write_text('Not a Chase export.\n')
+    return tmp_path
+
+
+def _importers():
+    return [
+        CheckingImporter(account='Assets:Checking:Chase',
+                         lastfour='1234',
+                         account_patterns=[('Schwab', 'Assets:Schwab')]),
+        CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                       lastfour='5678'),
+    ]
+
+
+def _summarize(directives):
+    return [(d.meta['filename'].rsplit('/', 1)[-1], d.meta['lineno'],
+             str(d.date), d.postings[0].account) for d in directives]
+
+
+def test_extracts_directory_in_file_and_row_order(downloads):
+    directives = batch.extract_files(str(downloads), _importers(), workers=2)
+
+    assert [
+        ('Chase1234_Activity_20211019.CSV', 0, '2021-09-14',
+         'Assets:Checking:Chase'),
+        ('Chase1234_Activity_20211019.CSV', 1, '2021-09-13',
+         'Assets:Checking:Chase'),
+        ('Chase5678_Activity20210103_20210202_20210214.CSV', 0, '2021-11-04',
+         'Liabilities:Credit-Cards:Chase'),
+        ('Chase5678_Activity20210103_20210202_20210214.CSV', 1, '2021-10-29',
+         'Liabilities:Credit-Cards:Chase'),
+    ] == _summarize(directives)
+    assert 'Assets:Schwab' == directives[1].postings[1].account
+
+
+def test_parallel_extraction_matches_serial_extraction(downloads):
+    files = [
+        downloads / 'Chase5678_Activity20210103_20210202_20210214.CSV',
+        downloads / 'Chase1234_Activity_20211019.CSV',
+    ]
+
+    assert batch.extract_files(files, _importers(),
+                               workers=1) == batch.extract_files(files,
+                                                                 _importers(),
+                                                                 workers=2)
+
+
+def test_spawned_workers_receive_pickled_importers(downloads):
+    files = [downloads / 'Chase1234_Activity_20211019.CSV']
+    importers = _importers()
+    importers.append(
+        CheckingImporter(account='Assets:Checking:Chase',
+                         lastfour='1234',
+                         instrument=True))
+
+    assert batch.extract_files(
+        files, importers, workers=1) == batch.extract_files(
+            files,
+            importers,
+            workers=2,
+            mp_context=multiprocessing.get_context('spawn'))
@@ -0,0 +1,163 @@
+import collections
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Part of every DiskCache key. Bump it whenever extraction output changes, so
+# that entries written by older versions are ignored.
+_DISK_FORMAT_VERSION = 1
+
+
+class LruCache:
+    """A size-bounded mapping that evicts the least recently used entry.
+
+    By default each entry counts as one towards maxsize. Pass sizeof to
+    bound the cache by what its values hold instead, such as the number of
+    directives extracted from each file.
+    """
+
+    def __init__(self, maxsize, sizeof=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._sizeof = sizeof
+        # The total size of the entries, as measured by sizeof.
+        self._size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Cached entries stay with the process that computed them, so a
+        # pickled cache, such as one sent to a worker process, starts empty.
+        return {'maxsize': self.maxsize, 'sizeof': self._sizeof}
+
+    def __setstate__(self, state):
+        self.__init__(state['maxsize'], state['sizeof'])
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self._measure(value)
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._measure(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += size
+            # A value larger than the whole cache evicts everything, itself
+            # included.
+            while self._entries and self._size > self.maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= self._measure(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _measure(self, value):
+        return self._sizeof(value) if self._sizeof else 1
+
+
+class DiskCache:
+    """Pickled values stored as files in a directory.
+
+    Entries outlive the process, so a key must describe everything its value
+    depends on. Unreadable entries are treated as missing.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def get(self, key, default=None):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+
+    def put(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.directory,
+                                         suffix='.tmp',
+                                         delete=False) as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Readers never see a partially written entry.
+        os.replace(f.name, self._path(key))
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr((_DISK_FORMAT_VERSION, key)).encode())
+        return os.path.join(self.directory, f'{digest.hexdigest()}.pickle')
+
+
+class TieredCache:
+    """An LruCache in front of an optional DiskCache."""
+
+    def __init__(self, maxsize, directory=None, sizeof=None):
+        self.memory = LruCache(maxsize, sizeof)
+        self.disk = DiskCache(directory) if directory else None
+
+    def get(self, key, default=None):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        return default if value is None else value
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+
+def stat_key(path):
+    """Build a cheap cache key that changes when a file is rewritten.
+
+    Unlike file_key(), this does not read the file, so it misses a rewrite
+    that keeps the file's size and modification time.
+
+    Args:
+        path: Path to the file on disk.
+
+    Returns:
+        A hashable tuple of the file's absolute path, modification time and
+        size.
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def file_key(path):
+    """Build a cache key that changes whenever a file's contents change.
+
+    Args:
+        path: Path to the file on disk.
+
+    Returns:
+        A hashable tuple of the file's absolute path, modification time, size,
+        and content hash.
+    """
+    key = stat_key(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return (*key, digest.hexdigest())
@@ -0,0 +1,73 @@
+from . import cache
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    lru = cache.LruCache(maxsize=2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    assert 1 == lru.get('a')
+    lru.put('c', 3)
+
+    assert lru.get('b') is None
+    assert 1 == lru.get('a')
+    assert 3 == lru.get('c')
+    assert 2 == len(lru)
+
+
+def test_lru_cache_bounds_total_size_of_values():
+    lru = cache.LruCache(maxsize=5, sizeof=len)
+    lru.put('a', (1, 2))
+    lru.put('b', (1, 2, 3))
+    lru.put('a', (1,))
+    lru.put('c', (1, 2))
+
+    assert lru.get('b') is None
+    assert (1,) == lru.get('a')
+    assert (1, 2) == lru.get('c')
+
+    lru.put('d', tuple(range(6)))
+    assert 0 == len(lru)
+
+
+def test_lru_cache_counts_hits_and_misses():
+    lru = cache.LruCache(maxsize=4)
+    lru.put('a', 1)
+    lru.get('a')
+    lru.get('a')
+    lru.get('missing')
+
+    assert 2 == lru.hits
+    assert 1 == lru.misses
+
+
+def test_file_key_changes_with_content(tmp_path):
+    path = tmp_path / 'example.csv'
+    path.write_bytes(b'abc')
+    before = cache.file_key(str(path))
+    path.write_bytes(b'abd')
+
+    assert before != cache.file_key(str(path))
+
+
+def test_disk_cache_persists_across_instances(tmp_path):
+    cache.DiskCache(str(tmp_path)).put(('a', 1), [1, 2])
+
+    assert [1, 2] == cache.DiskCache(str(tmp_path)).get(('a', 1))
+    assert cache.DiskCache(str(tmp_path)).get(('a', 2)) is None
+
+
+def test_disk_cache_ignores_corrupt_entries(tmp_path):
+    disk = cache.DiskCache(str(tmp_path))
+    disk.put('a', 1)
+    for entry in tmp_path.iterdir():
+        entry.write_bytes(b'not a pickle')
+
+    assert disk.get('a') is None
+
+
+def test_tiered_cache_reads_through_to_disk(tmp_path):
+    cache.TieredCache(maxsize=2, directory=str(tmp_path)).put('a', 1)
+
+    tiered = cache.TieredCache(maxsize=2, directory=str(tmp_path))
+    assert 1 == tiered.get('a')
+    assert 1 == len(tiered.memory)
@@ -0,0 +1,59 @@
+import collections
+
+from . import cache
+
+# Number of distinct strings whose title cased form is remembered. Chase
+# exports repeat the same merchant names, so a few thousand covers most files.
+_DEFAULT_CACHE_SIZE = 4096
+
+CacheInfo = collections.namedtuple('CacheInfo',
+                                   ['hits', 'misses', 'maxsize', 'currsize'])
+
+_cache = cache.LruCache(_DEFAULT_CACHE_SIZE)
+
+
+def titlecase(text, callback=None):
+    """Title case a string, reusing the result for strings seen recently.
+
+    Args:
+        text: The string to title case.
+        callback: Optional titlecase callback for special-casing words. It is
+            part of the cache key, so it should be a module-level function
+            rather than a closure created per call.
+
+    Returns:
+        The title cased string.
+    """
+    key = (text, callback)
+    result = _cache.get(key)
+    if result is None:
+        # Imported on first use, since the library compiles dozens of regexes
+        # on import.
+        import titlecase as titlecase_lib  # pylint: disable=import-outside-toplevel
+        result = titlecase_lib.titlecase(text, callback=callback)
+        _cache.put(key, result)
+    return result
+
+
+def cache_info():
+    """Report how well the title case cache is performing.
+
+    Returns:
+        A CacheInfo of hits, misses, the maximum size, and the current size.
+    """
+    return CacheInfo(_cache.hits, _cache.misses, _cache.maxsize, len(_cache))
+
+
+def set_cache_size(maxsize):
+    """Change the number of strings the title case cache remembers.
+
+    Args:
+        maxsize: The new maximum number of cached strings.
+    """
+    _cache.maxsize = maxsize
+    _cache.clear()
+
+
+def clear_cache():
+    """Forget all cached strings and reset the hit and miss counters."""
+    _cache.clear()
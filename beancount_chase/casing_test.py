@@ -0,0 +1,44 @@
+import titlecase
+
+from . import casing
+
+
+def test_titlecase_matches_titlecase_library():
+    casing.clear_cache()
+
+    assert titlecase.titlecase('GOOGLE *CLOUD_02BB66-C') == casing.titlecase(
+        'GOOGLE *CLOUD_02BB66-C')
+
+
+def test_titlecase_counts_hits_and_misses():
+    casing.clear_cache()
+
+    casing.titlecase('MONTHLY SERVICE FEE')
+    casing.titlecase('MONTHLY SERVICE FEE')
+    casing.titlecase('FEE REVERSAL')
+
+    info = casing.cache_info()
+    assert 1 == info.hits
+    assert 2 == info.misses
+    assert 2 == info.currsize
+
+
+def test_titlecase_caches_per_callback():
+    casing.clear_cache()
+
+    def shout(word, **_):
+        return word.upper()
+
+    assert 'Fee Reversal' == casing.titlecase('FEE REVERSAL')
+    assert 'FEE REVERSAL' == casing.titlecase('FEE REVERSAL', callback=shout)
+
+
+def test_set_cache_size_bounds_cached_strings():
+    original_size = casing.cache_info().maxsize
+    casing.set_cache_size(2)
+    try:
+        for text in ['ONE', 'TWO', 'THREE']:
+            casing.titlecase(text)
+        assert 2 == casing.cache_info().currsize
+    finally:
+        casing.set_cache_size(original_size)
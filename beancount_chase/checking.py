@@ -1,239 +1,293 @@
-import csv
-import datetime
-import os
+import collections
 import re
 
-import titlecase
-from beancount.core import amount
 from beancount.core import data
-from beancount.core import flags
-from beancount.core import number as beancount_number
-from beancount.ingest import importer
+
+from . import balances
+from . import base
+from . import casing
+from . import sniff
 
 _COLUMN_DATE = 'Posting Date'
 _COLUMN_PAYEE = 'Description'
 _COLUMN_AMOUNT = 'Amount'
 _COLUMN_TYPE = 'Type'
+_COLUMN_BALANCE = 'Balance'
+
+# The columns the importer reads from each row.
+_Row = collections.namedtuple(
+    '_Row', ['date', 'description', 'amount', 'transaction_type', 'balance'])
+
+_ROW_COLUMNS = _Row(date=_COLUMN_DATE,
+                    description=_COLUMN_PAYEE,
+                    amount=_COLUMN_AMOUNT,
+                    transaction_type=_COLUMN_TYPE,
+                    balance=_COLUMN_BALANCE)
 
 _FILENAME_PATTERN = re.compile(r'Chase(\d{4})_Activity_[\d_]{8}.*\.CSV',
                                re.IGNORECASE)
 
 
-class CheckingImporter(importer.ImporterProtocol):
-
-    def __init__(self,
-                 account,
-                 lastfour=None,
-                 currency='USD',
-                 account_patterns=None,
-                 title_case=True):
-        self._account = account
-        self._last_four_account_digits = lastfour
-        self._currency = currency
-        self._account_patterns = []
-        self._title_case = title_case
-        if account_patterns:
-            for pattern, account_name in account_patterns:
-                self._account_patterns.append(
-                    (_compile_regex(pattern), account_name))
-
-    def _parse_amount(self, amount_raw):
-        return amount.Amount(beancount_number.D(amount_raw), self._currency)
-
-    def file_date(self, file):
-        return max(map(lambda x: x.date, self.extract(file)))
-
-    def file_account(self, _):
-        return self._account
-
-    def identify(self, file):
-        match = _FILENAME_PATTERN.match(os.path.basename(file.name))
-        if not match:
-            return False
-        return self._last_four_account_digits == match.group(1)
-
-    def extract(self, f):
-        transactions = []
-
-        with open(f.name, encoding='utf-8') as csv_file:
-            for index, row in enumerate(csv.DictReader(csv_file)):
-                metadata = data.new_metadata(f.name, index)
-                transaction = self._extract_transaction_from_row(row, metadata)
-                if not transaction:
-                    continue
-                transactions.append(transaction)
-
-        return transactions
-
-    def _extract_transaction_from_row(self, row, metadata):
-        transaction_date = datetime.datetime.strptime(row[_COLUMN_DATE],
-                                                      '%m/%d/%Y').date()
-        payee, transaction_description = _parse_payee(row[_COLUMN_PAYEE],
-                                                      row[_COLUMN_TYPE])
-        if payee:
+def _abbreviations(word, **_):
+    if word.upper() == 'ACH':
+        return word.upper()
+    if word.upper() == 'PMNTS':
+        return 'Payments'
+    if word.upper() == 'FX':
+        return 'Foreign Exchange'
+    return None
 
-            def abbreviations(word, **_):
-                if word.upper() == 'ACH':
-                    return word.upper()
-                if word.upper() == 'PMNTS':
-                    return 'Payments'
-                if word.upper() == 'FX':
-                    return 'Foreign Exchange'
-                return None
-
-            payee = titlecase.titlecase(
-                payee, callback=abbreviations) if self._title_case else payee
-        else:
-            raise ValueError(
-                f'failed to parse {_COLUMN_PAYEE}={row[_COLUMN_PAYEE]}, '
-                f'{_COLUMN_TYPE}={row[_COLUMN_TYPE]}')
-        if transaction_description:
-            narration = (titlecase.titlecase(transaction_description)
-                         if self._title_case else transaction_description)
-        else:
-            narration = None
-        if row[_COLUMN_AMOUNT]:
-            transaction_amount = self._parse_amount(row[_COLUMN_AMOUNT])
-        else:
-            return None  # 0 dollar transaction
-
-        if transaction_amount == amount.Amount(beancount_number.D(0),
-                                               self._currency):
-            return None
-
-        postings = [
-            data.Posting(account=self._account,
-                         units=transaction_amount,
-                         cost=None,
-                         price=None,
-                         flag=None,
-                         meta=None)
-        ]
-        for pattern, account_name in self._account_patterns:
-            if _pattern_matches_transaction(pattern, payee, narration):
-                postings.append(
-                    data.Posting(account=account_name,
-                                 units=-transaction_amount,
-                                 cost=None,
-                                 price=None,
-                                 flag=None,
-                                 meta=None))
-                break
-
-        # For some reason, pylint thinks data.Transactions is not callable.
-        # pylint: disable=not-callable
-        return data.Transaction(
-            meta=metadata,
-            date=transaction_date,
-            flag=flags.FLAG_OKAY,
-            payee=payee,
-            narration=narration,
-            tags=data.EMPTY_SET,
-            links=data.EMPTY_SET,
-            postings=postings,
-        )
-
-
-def _compile_regex(pattern):
-    return re.compile(pattern, re.IGNORECASE)
-
-
-# Collection of regex patterns for parsing Chase transactions.
+
+# Collection of regex patterns for parsing Chase transactions. They are compiled
+# by _PayeeClassifier when first needed, so importing the module stays cheap.
 _TRANSACTION_PATTERNS = [
     # Debit card transaction.
-    (_compile_regex(r'^DEBIT_CARD$'), lambda _, desc: (desc, None)),
+    (r'^DEBIT_CARD$', lambda _, desc: (desc, None)),
 
     # ACH transaction with company name and description (full format).
-    (_compile_regex(r'ORIG CO NAME:(.+?)\s*ORIG ID:.*DESC DATE:.*'
-                    r'CO ENTRY DESCR:(.+?)\s*SEC:.*TRACE#:.*EED:.*'),
-     lambda m, _: (m.group(1), m.group(2))),
+    (r'ORIG CO NAME:(.+?)\s*ORIG ID:.*DESC DATE:.*'
+     r'CO ENTRY DESCR:(.+?)\s*SEC:.*TRACE#:.*EED:.*', lambda m, _:
+     (m.group(1), m.group(2))),
 
     # ACH transaction with company name and description (simple format).
-    (_compile_regex(r'ORIG CO NAME:(.+?)\s*CO ENTRY DESCR:(.+?)\s*SEC:'),
-     lambda m, _: (m.group(1), m.group(2))),
+    (r'ORIG CO NAME:(.+?)\s*CO ENTRY DESCR:(.+?)\s*SEC:', lambda m, _:
+     (m.group(1), m.group(2))),
 
     # Outbound transfer.
-    (_compile_regex(r'Online Transfer \d+ to (.+?)\s*transaction #'),
-     lambda m, desc: (m.group(1), desc)),
+    (r'Online Transfer \d+ to (.+?)\s*transaction #', lambda m, desc:
+     (m.group(1), desc)),
 
     # ACH payment.
-    (_compile_regex(r'^[a-z-]+ ACH Payment \d+ to ([a-z]+) \(_#+\d+\)$'),
-     lambda m, desc: (m.group(1), desc)),
+    (r'^[a-z-]+ ACH Payment \d+ to ([a-z]+) \(_#+\d+\)$', lambda m, desc:
+     (m.group(1), desc)),
 
     # Standard ACH fee.
-    (_compile_regex(r'^STANDARD ACH PMNTS INITIAL FEE$'), lambda _, desc:
-     (desc, None)),
+    (r'^STANDARD ACH PMNTS INITIAL FEE$', lambda _, desc: (desc, None)),
 
     # Inbound transfer.
-    (_compile_regex(r'Online Transfer \d+ from (.+?)\s*transaction #'),
-     lambda m, desc: (m.group(1), desc)),
+    (r'Online Transfer \d+ from (.+?)\s*transaction #', lambda m, desc:
+     (m.group(1), desc)),
 
     # Monthly service fee.
-    (_compile_regex(r'^MONTHLY SERVICE FEE$'), lambda _, desc: (desc, None)),
+    (r'^MONTHLY SERVICE FEE$', lambda _, desc: (desc, None)),
 
     # Monthly service fee reversal.
-    (_compile_regex(r'^Monthly Service Fee Reversal '), lambda _, desc:
-     (desc, None)),
+    (r'^Monthly Service Fee Reversal ', lambda _, desc: (desc, None)),
 
     # Real-time payment fee.
-    (_compile_regex(r'^RTP/'), lambda _, desc: (desc, None)),
+    (r'^RTP/', lambda _, desc: (desc, None)),
 
     # Wire transfer.
-    (_compile_regex('WIRE_OUTGOING'), lambda _, desc: (desc, None)),
+    ('WIRE_OUTGOING', lambda _, desc: (desc, None)),
 
     # Foreign exchange wire fee.
-    (_compile_regex('ONLINE FX INTERNATIONAL WIRE FEE'), lambda _, desc:
-     (desc, None)),
+    ('ONLINE FX INTERNATIONAL WIRE FEE', lambda _, desc: (desc, None)),
 
     # Fee reversal.
-    (_compile_regex(r'^FEE REVERSAL$'), lambda _, desc: (desc, None)),
+    (r'^FEE REVERSAL$', lambda _, desc: (desc, None)),
 
     # Deposit.
-    (_compile_regex(r'^DEPOSIT$'), lambda _, desc: (desc, None)),
+    (r'^DEPOSIT$', lambda _, desc: (desc, None)),
 ]
 
 
-def _parse_payee(description, transaction_type):
-    """Parse payee and description from transaction details.
+class _PayeeClassifier:
+    """Dispatches transactions to patterns based on the transaction type.
+
+    Patterns are tried in order, first against the description and then
+    against the transaction type, and the first match wins. Chase uses only a
+    handful of distinct types, so the first pattern that matches each type is
+    computed once. Rows then only need description searches against the
+    patterns up to and including that one. Patterns anchored to the start of
+    the string use match() so that the regex engine does not retry the anchor
+    at every offset.
+
+    Patterns are (regex, handler) pairs whose regexes are compiled
+    case-insensitively when a transaction type is first seen.
+    """
+
+    def __init__(self, patterns):
+        self._patterns = patterns
+        self._dispatch_by_type = {}
+
+    def classify(self, description, transaction_type):
+        """Parse payee and description from transaction details.
+
+        Args:
+            description: The transaction description string.
+            transaction_type: The type of transaction.
+
+        Returns:
+            Tuple of (pattern index, payee, description), or (None, None,
+            None) if no transaction pattern matches.
+        """
+        try:
+            candidates, type_index, type_match = self._dispatch_by_type[
+                transaction_type]
+        except KeyError:
+            candidates, type_index, type_match = self._build_dispatch(
+                transaction_type)
+            self._dispatch_by_type[transaction_type] = (candidates, type_index,
+                                                        type_match)
+
+        for index, search, handler in candidates:
+            match = search(description)
+            if match:
+                return (index, *handler(match, description))
+
+        if type_match:
+            return (type_index,
+                    *self._patterns[type_index][1](type_match, description))
+
+        return None, None, None
+
+    def _build_dispatch(self, transaction_type):
+        candidates = []
+        for index, (pattern, handler) in enumerate(self._patterns):
+            regex = re.compile(pattern, re.IGNORECASE)
+            candidates.append((index, _searcher(regex), handler))
+            match = regex.search(transaction_type)
+            if match:
+                return tuple(candidates), index, match
+        return tuple(candidates), None, None
+
+
+def _searcher(pattern):
+    """Returns a function equivalent to pattern.search.
 
     Args:
-        description: The transaction description string.
-        transaction_type: The type of transaction.
+        pattern: A compiled regex pattern.
 
     Returns:
-        Tuple of (payee, description) strings or (None, None) if no transaction
-        matches.
+        pattern.match if the whole pattern is anchored to the start of the
+        string, otherwise pattern.search.
     """
-    for pattern, handler in _TRANSACTION_PATTERNS:
-        # Try matching on the description.
-        match = pattern.search(description)
-        if match:
-            return handler(match, description)
+    if pattern.pattern.startswith('^') and '|' not in pattern.pattern:
+        return pattern.match
+    return pattern.search
 
-        # If no match on description, try matching the transaction type.
-        match = pattern.search(transaction_type)
-        if match:
-            return handler(match, description)
 
-    return None, None
+_PAYEE_CLASSIFIER = _PayeeClassifier(_TRANSACTION_PATTERNS)
 
 
-def _pattern_matches_transaction(pattern, payee, narration):
-    """Check if a pattern matches any part of a transaction.
+def _first_account_match(account_matcher, payee, narration):
+    """Find the first rule that matches any part of a transaction.
 
     Args:
-        pattern: Compiled regex pattern to match against.
+        account_matcher: The rules.RuleSet to match with.
         payee: The transaction payee string.
         narration: The transaction narration string.
 
     Returns:
-        True if pattern matches any target string.
+        The index of the first rule that matches the payee, the narration, or
+        the two concatenated, or None if no rule matches.
     """
-    if not payee:
-        return False
-
-    targets = [payee]
-    if narration:
-        targets.extend([narration, f'{payee}{narration}'])
+    if not payee or not account_matcher:
+        return None
+
+    if not narration:
+        return account_matcher.first_match(payee)
+
+    return account_matcher.first_match(payee, narration, f'{payee}{narration}')
+
+
+_Stages = collections.namedtuple(
+    '_Stages',
+    ['classify_payee', 'titlecase', 'match_account', 'new_transaction'])
+
+_STAGES = _Stages(
+    classify_payee=_PAYEE_CLASSIFIER.classify,
+    titlecase=casing.titlecase,
+    match_account=_first_account_match,
+    new_transaction=data.Transaction,
+)
+
+
+def _instrument_stages(stats, account_matcher):
+
+    def count_transaction_pattern(result):
+        pattern_index = result[0]
+        if pattern_index is not None:
+            stats.count_match('transaction_patterns',
+                              _TRANSACTION_PATTERNS[pattern_index][0])
+
+    def count_account_pattern(rule_index):
+        if rule_index is not None:
+            stats.count_match('account_patterns',
+                              account_matcher.pattern(rule_index))
+
+    return _Stages(
+        classify_payee=stats.timed('parse_payee', _STAGES.classify_payee,
+                                   count_transaction_pattern),
+        titlecase=stats.timed('titlecase', _STAGES.titlecase),
+        match_account=stats.timed('match_account', _STAGES.match_account,
+                                  count_account_pattern),
+        new_transaction=stats.timed('new_transaction', _STAGES.new_transaction),
+    )
+
+
+class CheckingImporter(base.ChaseImporter):
+
+    _filename_pattern = _FILENAME_PATTERN
+    _format = sniff.CHECKING
+    _row_columns = _ROW_COLUMNS
+    _stage_table = _STAGES
+    _instrument_stages = staticmethod(_instrument_stages)
+    _fingerprint_fields = ('date', 'description', 'amount', 'balance')
+    _optional_fields = ('balance',)
+    _detail_fields = ('description', 'transaction_type')
+
+    def __init__(self, account, *args, balance_assertions=None, **kwargs):
+        """Create a checking importer.
+
+        Takes the arguments of base.ChaseImporter, and:
+
+        Args:
+            balance_assertions: If balances.DAILY or balances.FILE_END, also
+                extract balance assertions from the Balance column, which
+                exports must then have.
+        """
+        super().__init__(account, *args, **kwargs)
+        if balance_assertions is not None:
+            # Fail on a bad mode now rather than on the first extraction.
+            balances.BalanceTracker(account, self._currency, balance_assertions)
+            self._optional_fields = ()
+        self._balance_assertions = balance_assertions
+
+    def _settings(self):
+        return (*super()._settings(), self._balance_assertions)
+
+    def _directives(self, extracted_rows):
+        if self._balance_assertions is None:
+            yield from super()._directives(extracted_rows)
+            return
+        tracker = balances.BalanceTracker(self._account, self._currency,
+                                          self._balance_assertions)
+        for row, transaction in extracted_rows:
+            yield from tracker.add(transaction.date, row.balance,
+                                   transaction.meta)
+            yield transaction
+        yield from tracker.finish()
+
+    def _row_details(self, row):
+        stages = self._stages
+        _, payee, transaction_description = stages.classify_payee(
+            row.description, row.transaction_type)
+        if payee:
+            payee = stages.titlecase(
+                payee, callback=_abbreviations) if self._title_case else payee
+        else:
+            raise ValueError(
+                f'failed to parse {_COLUMN_PAYEE}={row.description}, '
+                f'{_COLUMN_TYPE}={row.transaction_type}')
+        if transaction_description:
+            narration = (stages.titlecase(transaction_description)
+                         if self._title_case else transaction_description)
+        else:
+            narration = None
+        return payee, narration
 
-    return any(pattern.search(target) for target in targets)
+    def _other_account(self, row, payee, narration):
+        rule_index = self._stages.match_account(self._account_matcher, payee,
+                                                narration)
+        return self._rule_account(rule_index)
@@ -1,10 +1,16 @@
+import datetime
 import io
+import pickle
 import textwrap
+import types
 
 import pytest  # NOQA, pylint: disable=unused-import
 from beancount.ingest import extract
 
 from . import CheckingImporter
+from . import balances
+from . import base
+from . import watermarks
 
 
 def _unindent(indented):
@@ -309,3 +315,345 @@ def test_extracts_simple_ach_credit(tmp_path):
         2025-09-09 * "Stripe" "Transfer"
           Assets:Checking:Chase  85.59 USD
         """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_file_date_returns_latest_nonzero_transaction_date(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20211019.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,09/14/2021,"MONTHLY SERVICE FEE",0.00,FEE_TRANSACTION,4325.75,,
+            DEBIT,09/13/2021,"Online Transfer 12345678901 to Schwab Personal Checking ########9876 transaction #: 12345678901 09/13",-2500.00,ACCT_XFER,4325.75,,
+            DEBIT,08/31/2021,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,6825.75,,
+            """))
+
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234')
+    with chase_file.open() as f:
+        assert datetime.date(2021, 9, 13) == importer.file_date(f)
+        importer.extract(f)
+        assert datetime.date(2021, 9, 13) == importer.file_date(f)
+
+
+def test_extract_reparses_file_after_it_changes(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20230919.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,08/31/2023,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,2118.39,,
+            """))
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234')
+    with chase_file.open() as f:
+        importer.extract(f)
+
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,09/30/2023,"MONTHLY SERVICE FEE",-25.00,FEE_TRANSACTION,2093.39,,
+            """))
+    with chase_file.open() as f:
+        directives = importer.extract(f)
+
+    assert _unindent("""
+        2023-09-30 * "Monthly Service Fee" ""
+          Assets:Checking:Chase  -25.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_earlier_type_pattern_takes_priority_over_later_description_pattern(
+        tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20211019.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/05/2025,"Online Transfer 123 to Savings transaction #: 123",-10.00,DEBIT_CARD,1000.00,,
+            DEBIT,01/06/2025,"Online Transfer 456 to Savings transaction #: 456",-15.00,ACCT_XFER,985.00,,
+            """))
+
+    with chase_file.open() as f:
+        directives = CheckingImporter(account='Assets:Checking:Chase',
+                                      lastfour='1234',
+                                      title_case=False).extract(f)
+
+    assert _unindent("""
+        2025-01-05 * "Online Transfer 123 to Savings transaction #: 123" ""
+          Assets:Checking:Chase  -10.00 USD
+
+        2025-01-06 * "Savings" "Online Transfer 456 to Savings transaction #: 456"
+          Assets:Checking:Chase  -15.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_extract_iter_yields_same_transactions_as_extract(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20211019.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/05/2025,"Spotify",-10.00,DEBIT_CARD,1000.00,,
+            DEBIT,01/04/2025,"MONTHLY SERVICE FEE",0.00,FEE_TRANSACTION,1010.00,,
+            DSLIP,01/03/2025,"Cash Redemption",7.76,DEPOSIT,1010.00,,
+            """))
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234')
+
+    with chase_file.open() as f:
+        transactions = importer.extract_iter(f)
+        assert isinstance(transactions, types.GeneratorType)
+        streamed = list(transactions)
+
+    with chase_file.open() as f:
+        assert importer.extract(f) == streamed
+        assert importer.extract(f) == list(importer.extract_iter(f))
+    assert 2 == len(streamed)
+
+
+def test_records_stage_stats_when_instrumented(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20211019.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/05/2025,"GITHUB",-10.00,DEBIT_CARD,1000.00,,
+            DEBIT,01/04/2025,"MONTHLY SERVICE FEE",0.00,FEE_TRANSACTION,1010.00,,
+            DEBIT,01/03/2025,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,1010.00,,
+            """))
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234',
+                                account_patterns=[
+                                    ('github', 'Expenses:Cloud-Services:Github')
+                                ],
+                                instrument=True)
+
+    with chase_file.open() as f:
+        importer.extract(f)
+
+    stats = importer.stats.as_dict()
+    assert 3 == stats['calls']['parse_payee']
+    assert 2 == stats['calls']['new_transaction']
+    assert {'zero_amount_rows': 1} == stats['counts']
+    assert {
+        'transaction_patterns': {
+            '^DEBIT_CARD$': 1,
+            '^MONTHLY SERVICE FEE$': 2,
+        },
+        'account_patterns': {
+            'github': 1,
+        },
+    } == stats['matches']
+
+
+def test_does_not_record_stats_by_default():
+    assert CheckingImporter(account='Assets:Checking:Chase',
+                            lastfour='1234').stats is None
+
+
+def test_pickled_importer_extracts_same_transactions(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20211019.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/05/2025,"GITHUB",-10.00,DEBIT_CARD,1000.00,,
+            DEBIT,01/03/2025,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,1010.00,,
+            """))
+
+    for instrument in (False, True):
+        importer = CheckingImporter(account='Assets:Checking:Chase',
+                                    lastfour='1234',
+                                    instrument=instrument)
+        unpickled = pickle.loads(pickle.dumps(importer))
+        with chase_file.open() as f:
+            assert importer.extract(f) == unpickled.extract(f)
+        if instrument:
+            assert 2 == unpickled.stats.calls['parse_payee']
+
+
+def test_extracts_only_new_rows_with_watermarks(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20250105.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/03/2025,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,1010.00,,
+            """))
+    store = watermarks.WatermarkStore(str(tmp_path / 'watermarks.json'))
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234',
+                                watermarks=store)
+    with chase_file.open() as f:
+        assert 1 == len(importer.extract(f))
+
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/04/2025,"GITHUB",-4.00,DEBIT_CARD,991.00,,
+            DEBIT,01/03/2025,"FEE REVERSAL",-15.00,REFUND_TRANSACTION,995.00,,
+            DEBIT,01/03/2025,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,1010.00,,
+            """))
+    with chase_file.open() as f:
+        directives = importer.extract(f)
+
+    assert _unindent("""
+        2025-01-04 * "Github" ""
+          Assets:Checking:Chase  -4.00 USD
+
+        2025-01-03 * "Fee Reversal" ""
+          Assets:Checking:Chase  -15.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_date_range_spans_nonzero_transactions(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20211019.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,09/14/2021,"MONTHLY SERVICE FEE",0.00,FEE_TRANSACTION,4325.75,,
+            DEBIT,09/13/2021,"Online Transfer 12345678901 to Schwab Personal Checking ########9876 transaction #: 12345678901 09/13",-2500.00,ACCT_XFER,4325.75,,
+            DEBIT,08/31/2021,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,6825.75,,
+            """))
+
+    with chase_file.open() as f:
+        assert (datetime.date(2021, 8, 31), datetime.date(
+            2021, 9, 13)) == CheckingImporter(account='Assets:Checking:Chase',
+                                              lastfour='1234').date_range(f)
+
+
+def test_does_not_identify_file_with_other_columns(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20211019.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,01/06/2021,01/07/2021,AMZN Mktp US,Shopping,Sale,-20.54,
+            """))
+
+    with chase_file.open() as f:
+        assert not CheckingImporter(account='Assets:Checking:Chase',
+                                    lastfour='1234').identify(f)
+
+
+def test_extracts_daily_balance_assertions(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20250105.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/04/2025,"GITHUB",-4.00,DEBIT_CARD,991.00,,
+            DEBIT,01/03/2025,"FEE REVERSAL",-15.00,REFUND_TRANSACTION,995.00,,
+            DEBIT,01/03/2025,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,1010.00,,
+            """))
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234',
+                                balance_assertions=balances.DAILY)
+
+    with chase_file.open() as f:
+        directives = importer.extract(f)
+        assert datetime.date(2025, 1, 4) == importer.file_date(f)
+
+    assert _unindent("""
+        2025-01-04 * "Github" ""
+          Assets:Checking:Chase  -4.00 USD
+
+        2025-01-05 balance Assets:Checking:Chase                           991.00 USD
+
+        2025-01-03 * "Fee Reversal" ""
+          Assets:Checking:Chase  -15.00 USD
+
+        2025-01-03 * "Monthly Service Fee" ""
+          Assets:Checking:Chase  -15.00 USD
+
+        2025-01-04 balance Assets:Checking:Chase                           995.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_extracts_export_without_balance_column(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20250105.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type
+            DEBIT,01/04/2025,"GITHUB",-4.00,DEBIT_CARD
+            """))
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234',
+                                watermarks=watermarks.WatermarkStore())
+
+    with chase_file.open() as f:
+        assert importer.identify(f)
+        directives = importer.extract(f)
+
+    assert _unindent("""
+        2025-01-04 * "Github" ""
+          Assets:Checking:Chase  -4.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+    with chase_file.open() as f, pytest.raises(KeyError):
+        CheckingImporter(account='Assets:Checking:Chase',
+                         lastfour='1234',
+                         balance_assertions=balances.DAILY).extract(f)
+
+
+def test_columnar_extract_matches_row_extract(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20250105.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/04/2025,"GITHUB",-4.00,DEBIT_CARD,987.00,,
+            DEBIT,01/04/2025,"GITHUB",-4.00,DEBIT_CARD,991.00,,
+            DEBIT,01/03/2025,"FEE REVERSAL",0.00,REFUND_TRANSACTION,995.00,,
+
+            DEBIT,01/03/2025,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,995.00,,
+            """))
+    settings = {
+        'account': 'Assets:Checking:Chase',
+        'lastfour': '1234',
+        'account_patterns': [('github', 'Expenses:Cloud-Services:Github')],
+        'balance_assertions': balances.DAILY,
+    }
+
+    with chase_file.open() as f:
+        expected = CheckingImporter(**settings).extract(f)
+    with chase_file.open() as f:
+        actual = CheckingImporter(**settings, columnar=True).extract(f)
+
+    assert 5 == len(actual)
+    assert _stringify_directives(expected) == _stringify_directives(actual)
+    assert expected == actual
+
+
+def test_columnar_extract_rejects_unknown_zero_amount_row(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity_20250105.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/04/2025,"GITHUB",-4.00,DEBIT_CARD,991.00,,
+            DEBIT,01/03/2025,"WEIRD UNKNOWN THING",0.00,MISC,995.00,,
+            """))
+
+    for columnar in (False, True):
+        importer = CheckingImporter(account='Assets:Checking:Chase',
+                                    lastfour='1234',
+                                    columnar=columnar)
+        with chase_file.open() as f, pytest.raises(ValueError,
+                                                   match='WEIRD UNKNOWN'):
+            importer.extract(f)
+
+
+def test_columnar_extract_iter_reads_a_chunk_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(base, '_COLUMNAR_CHUNK_ROWS', 2)
+    chase_file = tmp_path / 'Chase1234_Activity_20250105.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/05/2025,"GITHUB",-4.00,DEBIT_CARD,987.00,,
+            DEBIT,01/04/2025,"GITHUB",-4.00,DEBIT_CARD,991.00,,
+            DEBIT,01/03/2025,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,995.00,,
+            DEBIT,01/02/2025,"WEIRD UNKNOWN THING",-1.00,MISC,1010.00,,
+            """))
+    importer = CheckingImporter(account='Assets:Checking:Chase',
+                                lastfour='1234',
+                                instrument=True,
+                                columnar=True)
+
+    with chase_file.open() as f:
+        directives = importer.extract_iter(f)
+        next(directives)
+        assert 2 == importer.stats.calls['read_csv']
+        assert 2 == len([next(directives), next(directives)])
+        with pytest.raises(ValueError):
+            next(directives)
@@ -0,0 +1,93 @@
+import csv
+import operator
+
+
+def read_records(csv_file, names, optional=()):
+    """Read the named columns of each row of a CSV file into a record.
+
+    The header is resolved to column indices once, so that unlike
+    csv.DictReader no dict is built per row. Rows are counted the way
+    DictReader counts them: blank lines are skipped, and a column missing
+    from a short row reads as None.
+
+    Args:
+        csv_file: Text stream of a CSV file whose first row is its header.
+        names: A namedtuple whose values are the names of the columns to
+            read.
+        optional: Fields of names whose columns the header may lack. A
+            missing optional column reads as None in every row.
+
+    Yields:
+        For each row, a namedtuple of the same type as names, holding the
+        row's values of the columns.
+
+    Raises:
+        KeyError: If the header has no column with one of the names that are
+            not optional.
+    """
+    reader = csv.reader(csv_file)
+    header = next(reader, [])
+    indices = _column_indices(header, names, optional)
+    present = [index for index in indices if index is not None]
+    values_of = _tuple_getter(present)
+    if len(present) < len(indices):
+        values_of = _with_missing(values_of, indices)
+    make_record = names._make
+    width = len(header)
+    padding = [None] * width
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row = row + padding[len(row):]
+        yield make_record(values_of(row))
+
+
+def _column_indices(header, names, optional):
+    # Like DictReader, a name repeated in the header refers to its last
+    # column. A missing optional column has no index.
+    positions = {name: position for position, name in enumerate(header)}
+    indices = []
+    for field, name in zip(names._fields, names):
+        if field in optional:
+            indices.append(positions.get(name))
+        else:
+            indices.append(positions[name])
+    return indices
+
+
+def _with_missing(values_of, indices):
+    # A missing optional column reads as a constant None, never as whatever
+    # an over-long row holds past the header. The Nones are appended after
+    # the present values and rearranged into field order.
+    nones = (None,) * sum(index is None for index in indices)
+    arrange = _tuple_getter(_field_order(indices))
+    return lambda row: arrange(values_of(row) + nones)
+
+
+def _field_order(indices):
+    # For each field, its position among the present values, or past them
+    # among the Nones of the missing ones.
+    present_count = sum(index is not None for index in indices)
+    order = []
+    next_present = 0
+    next_missing = present_count
+    for index in indices:
+        if index is None:
+            order.append(next_missing)
+            next_missing += 1
+        else:
+            order.append(next_present)
+            next_present += 1
+    return order
+
+
+def _tuple_getter(indices):
+    # Unlike a bare itemgetter, always returns a tuple, even of one or no
+    # items.
+    if len(indices) == 1:
+        index, = indices
+        return lambda values: (values[index],)
+    if not indices:
+        return lambda values: ()
+    return operator.itemgetter(*indices)
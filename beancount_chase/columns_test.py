@@ -0,0 +1,44 @@
+import collections
+import io
+
+import pytest
+
+from . import columns
+
+_Row = collections.namedtuple('_Row', ['date', 'memo'])
+
+_NAMES = _Row(date='Date', memo='Memo')
+
+
+def _csv_file():
+    return io.StringIO('Date,Amount,Memo\n'
+                       '01/02/2024,-1.00,coffee\n'
+                       '\n'
+                       '01/03/2024,2.00\n')
+
+
+def test_read_records_skips_blank_lines_and_pads_short_rows():
+    assert [_Row('01/02/2024', 'coffee'),
+            _Row('01/03/2024',
+                 None)] == list(columns.read_records(_csv_file(), _NAMES))
+
+
+def test_read_records_reads_missing_optional_column_as_none():
+    names = _Row(date='Date', memo='Note')
+
+    assert [_Row('01/02/2024', None),
+            _Row('01/03/2024', None)] == list(
+                columns.read_records(_csv_file(), names, optional=('memo',)))
+    with pytest.raises(KeyError):
+        list(columns.read_records(_csv_file(), names))
+
+
+def test_read_records_ignores_over_long_rows_for_missing_columns():
+    names = _Row(date='Date', memo='Note')
+    csv_file = io.StringIO('Date,Amount\n'
+                           '01/02/2024,-1.00,\n'
+                           '01/03/2024,2.00,extra,more\n')
+
+    records = list(columns.read_records(csv_file, names, optional=('memo',)))
+
+    assert [_Row('01/02/2024', None), _Row('01/03/2024', None)] == records
@@ -1,114 +1,139 @@
-import csv
-import datetime
-import os
+import collections
 import re
 
-import titlecase
-from beancount.core import amount
 from beancount.core import data
-from beancount.core import flags
-from beancount.core import number as beancount_number
-from beancount.ingest import importer
+
+from . import base
+from . import casing
+from . import sniff
 
 _COLUMN_DATE = 'Transaction Date'
 _COLUMN_PAYEE = 'Description'
 _COLUMN_AMOUNT = 'Amount'
+_COLUMN_CATEGORY = 'Category'
+_COLUMN_TYPE = 'Type'
+
+# The columns the importer reads from each row.
+_Row = collections.namedtuple(
+    '_Row', ['date', 'description', 'amount', 'category', 'transaction_type'])
+
+_ROW_COLUMNS = _Row(date=_COLUMN_DATE,
+                    description=_COLUMN_PAYEE,
+                    amount=_COLUMN_AMOUNT,
+                    category=_COLUMN_CATEGORY,
+                    transaction_type=_COLUMN_TYPE)
 
 _FILENAME_PATTERN = re.compile(r'Chase(\d{4})_Activity([\d]+_)*[\d]+.CSV',
                                re.IGNORECASE)
 
 
-class CreditImporter(importer.ImporterProtocol):
-
-    def __init__(self,
-                 account,
-                 lastfour=None,
-                 currency='USD',
-                 account_patterns=None,
-                 title_case=True):
-        self._account = account
-        self._last_four_account_digits = lastfour
-        self._currency = currency
-        self._account_patterns = []
-        self._title_case = title_case
-        if account_patterns:
-            for pattern, account_name in account_patterns:
-                self._account_patterns.append(
-                    (re.compile(pattern, flags=re.IGNORECASE), account_name))
-
-    def _parse_amount(self, amount_raw):
-        return amount.Amount(beancount_number.D(amount_raw), self._currency)
-
-    def file_date(self, file):
-        return max(map(lambda x: x.date, self.extract(file)))
-
-    def file_account(self, _):
-        return self._account
-
-    def identify(self, file):
-        match = _FILENAME_PATTERN.match(os.path.basename(file.name))
-        if not match:
-            return False
-        return self._last_four_account_digits == match.group(1)
-
-    def extract(self, f):
-        transactions = []
-
-        with open(f.name, encoding='utf-8') as csv_file:
-            for index, row in enumerate(csv.DictReader(csv_file)):
-                metadata = data.new_metadata(f.name, index)
-                transaction = self._extract_transaction_from_row(row, metadata)
-                if not transaction:
-                    continue
-                transactions.append(transaction)
-
-        return transactions
-
-    def _extract_transaction_from_row(self, row, metadata):
-        transaction_date = datetime.datetime.strptime(row[_COLUMN_DATE],
-                                                      '%m/%d/%Y').date()
-
-        payee = row[_COLUMN_PAYEE]
-        transaction_description = (titlecase.titlecase(payee)
+def _first_account_match(account_matcher, payee):
+    return account_matcher.first_match(payee)
+
+
+def _category_account(category_accounts, category, transaction_type):
+    """Look up the account that Chase's categorization maps to.
+
+    Args:
+        category_accounts: A dict from (Category, Type) pairs, where Type or
+            Category may be None to match any, to account names.
+        category: The row's Category.
+        transaction_type: The row's Type.
+
+    Returns:
+        The account of the most specific matching key, or None.
+    """
+    for key in ((category, transaction_type), (category, None),
+                (None, transaction_type)):
+        account_name = category_accounts.get(key)
+        if account_name is not None:
+            return account_name
+    return None
+
+
+_Stages = collections.namedtuple(
+    '_Stages',
+    ['titlecase', 'match_account', 'match_category', 'new_transaction'])
+
+_STAGES = _Stages(
+    titlecase=casing.titlecase,
+    match_account=_first_account_match,
+    match_category=_category_account,
+    new_transaction=data.Transaction,
+)
+
+
+def _instrument_stages(stats, account_matcher):
+
+    def count_account_pattern(rule_index):
+        if rule_index is not None:
+            stats.count_match('account_patterns',
+                              account_matcher.pattern(rule_index))
+
+    def count_category_account(account_name):
+        if account_name is not None:
+            stats.count_match('category_accounts', account_name)
+
+    return _Stages(
+        titlecase=stats.timed('titlecase', _STAGES.titlecase),
+        match_account=stats.timed('match_account', _STAGES.match_account,
+                                  count_account_pattern),
+        match_category=stats.timed('match_category', _STAGES.match_category,
+                                   count_category_account),
+        new_transaction=stats.timed('new_transaction', _STAGES.new_transaction),
+    )
+
+
+class CreditImporter(base.ChaseImporter):
+
+    _filename_pattern = _FILENAME_PATTERN
+    _format = sniff.CREDIT
+    _row_columns = _ROW_COLUMNS
+    _stage_table = _STAGES
+    _instrument_stages = staticmethod(_instrument_stages)
+    _fingerprint_fields = ('date', 'description', 'amount')
+    _optional_fields = ('category', 'transaction_type')
+    _detail_fields = ('description',)
+    _account_fields = ('description', 'category', 'transaction_type')
+
+    def __init__(self, account, *args, category_accounts=None, **kwargs):
+        """Create a credit card importer.
+
+        Takes the arguments of base.ChaseImporter, and:
+
+        Args:
+            category_accounts: A mapping from how Chase categorizes a
+                transaction to the account that balances it. A key is either
+                a Category, such as 'Shopping', or a (Category, Type) pair,
+                such as ('', 'Payment'), which takes priority over its
+                Category alone. A pair whose Category is None matches any
+                Category. Rules in account_patterns take priority over the
+                mapping. An export without a Category or Type column only
+                matches keys that leave that column None.
+        """
+        super().__init__(account, *args, **kwargs)
+        self._category_accounts = {
+            (key, None) if isinstance(key, str) else tuple(key): account_name
+            for key, account_name in (category_accounts or {}).items()
+        }
+
+    def _settings(self):
+        return (*super()._settings(),
+                tuple(sorted(self._category_accounts.items(), key=repr)))
+
+    def _row_details(self, row):
+        payee = row.description
+        transaction_description = (self._stages.titlecase(payee)
                                    if self._title_case else payee)
-
-        if row[_COLUMN_AMOUNT]:
-            transaction_amount = self._parse_amount(row[_COLUMN_AMOUNT])
-        else:
-            return None  # 0 dollar transaction
-
-        if transaction_amount == amount.Amount(beancount_number.D(0),
-                                               self._currency):
-            return None
-
-        postings = [
-            data.Posting(account=self._account,
-                         units=transaction_amount,
-                         cost=None,
-                         price=None,
-                         flag=None,
-                         meta=None)
-        ]
-        for pattern, account_name in self._account_patterns:
-            if pattern.search(payee):
-                postings.append(
-                    data.Posting(account=account_name,
-                                 units=-transaction_amount,
-                                 cost=None,
-                                 price=None,
-                                 flag=None,
-                                 meta=None))
-                break
-
-        # For some reason, pylint thinks data.Transactions is not callable.
-        # pylint: disable=not-callable
-        return data.Transaction(
-            meta=metadata,
-            date=transaction_date,
-            flag=flags.FLAG_OKAY,
-            payee=None,
-            narration=transaction_description,
-            tags=data.EMPTY_SET,
-            links=data.EMPTY_SET,
-            postings=postings,
-        )
+        return None, transaction_description
+
+    def _other_account(self, row, payee, narration):
+        stages = self._stages
+        rule_index = stages.match_account(self._account_matcher,
+                                          row.description)
+        if rule_index is not None:
+            return self._rule_account(rule_index)
+        if self._category_accounts:
+            return stages.match_category(self._category_accounts, row.category,
+                                         row.transaction_type)
+        return None
@@ -1,10 +1,17 @@
+import asyncio
+import datetime
 import io
 import textwrap
+import types
 
 import pytest  # NOQA, pylint: disable=unused-import
 from beancount.ingest import extract
 
 from . import CreditImporter
+from . import cache
+from . import rules
+from . import sources
+from . import watermarks
 
 
 def _unindent(indented):
@@ -150,3 +157,351 @@ def test_extracts_payment(tmp_path):
           Liabilities:Credit-Cards:Chase    4000.00 USD
           Assets:Checking:Bank-of-America  -4000.00 USD
         """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_file_date_returns_latest_transaction_date(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234')
+    with chase_file.open() as f:
+        assert datetime.date(2021, 11, 4) == importer.file_date(f)
+        importer.extract(f)
+        assert datetime.date(2021, 11, 4) == importer.file_date(f)
+
+
+def test_extract_iter_yields_same_transactions_as_extract(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234')
+
+    with chase_file.open() as f:
+        transactions = importer.extract_iter(f)
+        assert isinstance(transactions, types.GeneratorType)
+        streamed = list(transactions)
+
+    with chase_file.open() as f:
+        assert importer.extract(f) == streamed
+    assert 2 == len(streamed)
+
+
+def test_records_stage_stats_when_instrumented(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,11/01/2021,11/01/2021,AMZN Mktp US,Shopping,Sale,0.00,
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234',
+                              account_patterns=[('Payment Thank You',
+                                                 'Assets:Checking')],
+                              instrument=True)
+
+    with chase_file.open() as f:
+        importer.extract(f)
+
+    stats = importer.stats.as_dict()
+    assert 3 == stats['calls']['read_csv']
+    assert 2 == stats['calls']['match_account']
+    assert {'zero_amount_rows': 1} == stats['counts']
+    assert {'account_patterns': {'Payment Thank You': 1}} == stats['matches']
+
+
+def test_extracts_only_new_rows_with_watermarks(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234',
+                              watermarks=watermarks.WatermarkStore())
+    with chase_file.open() as f:
+        importer.extract(f)
+
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    with chase_file.open() as f:
+        directives = importer.extract(f)
+
+    assert _unindent("""
+        2021-11-04 * "Payment Thank You - Web"
+          Liabilities:Credit-Cards:Chase  4000.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_does_not_identify_checking_file(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+            DEBIT,01/03/2021,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,1010.00,,
+            """))
+
+    with chase_file.open() as f:
+        assert not CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                                  lastfour='1234').identify(f)
+
+
+def test_reuses_directives_cached_on_disk_until_settings_change(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    cache_dir = str(tmp_path / 'cache')
+
+    def extract_with(account_patterns):
+        importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                                  lastfour='1234',
+                                  account_patterns=account_patterns,
+                                  instrument=True,
+                                  cache_dir=cache_dir)
+        with chase_file.open() as f:
+            directives = importer.extract(f)
+        return directives, importer.stats.calls['read_csv']
+
+    directives, rows_read = extract_with([])
+    assert 1 == rows_read
+    assert (directives, 0) == extract_with([])
+    assert 1 == extract_with([('Google', 'Expenses:Cloud')])[1]
+
+
+def test_file_date_scans_rather_than_loading_disk_cache(tmp_path, monkeypatch):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    cache_dir = str(tmp_path / 'cache')
+    settings = {
+        'account': 'Liabilities:Credit-Cards:Chase',
+        'lastfour': '1234',
+        'cache_dir': cache_dir,
+    }
+    with chase_file.open() as f:
+        CreditImporter(**settings).extract(f)
+
+    def fail(*_):
+        raise AssertionError('read the disk cache')
+
+    monkeypatch.setattr(cache.DiskCache, 'get', fail)
+    with chase_file.open() as f:
+        assert datetime.date(2021, 11,
+                             4) == CreditImporter(**settings).file_date(f)
+
+
+def test_async_extraction_yields_same_transactions_as_extract(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+
+    async def extract_both(f):
+        importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                                  lastfour='1234')
+        streamed = [
+            transaction
+            async for transaction in importer.extract_aiter(f, chunk_size=1)
+        ]
+        return streamed, await importer.extract_async(f, chunk_size=1)
+
+    with chase_file.open() as f:
+        expected = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                                  lastfour='1234').extract(f)
+        assert (expected, expected) == asyncio.run(extract_both(f))
+    assert 2 == len(expected)
+
+
+def test_extracts_from_contents_in_memory():
+    contents = _unindent("""
+        Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+        1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+        """).encode('utf-8')
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234')
+
+    upload = sources.Source('Chase1234_Activity20211101.CSV', contents=contents)
+    directives = importer.extract(upload)
+
+    assert importer.identify(upload)
+    assert 'Chase1234_Activity20211101.CSV' == directives[0].meta['filename']
+    assert '<stream>' == importer.extract(
+        io.BytesIO(contents))[0].meta['filename']
+    assert _unindent("""
+        2021-10-29 * "Google *Cloud_02bb66-C"
+          Liabilities:Credit-Cards:Chase  -25.35 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_importers_share_compiled_rule_set(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    account_patterns = [('^google \\*cloud', 'Expenses:Cloud')]
+    rule_set = rules.compile_rules(account_patterns)
+
+    with chase_file.open() as f:
+        expected = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                                  lastfour='1234',
+                                  account_patterns=account_patterns).extract(f)
+        for lastfour in ('1234', '5678'):
+            importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                                      lastfour=lastfour,
+                                      account_patterns=rule_set)
+            assert expected == importer.extract(f)
+    assert 'Expenses:Cloud' == expected[0].postings[1].account
+
+
+def test_maps_category_and_type_to_account(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,11/02/2021,11/02/2021,AMZN Mktp US,Shopping,Return,12.00,
+            1234,11/01/2021,11/01/2021,AMZN Mktp US,Shopping,Sale,-12.00,
+            1234,10/30/2021,10/31/2021,GITHUB,Shopping,Sale,-4.00,
+            1234,10/29/2021,10/31/2021,GOOGLE *CLOUD_02BB66-C,Professional Services,Sale,-25.35,
+            """))
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234',
+                              account_patterns=[('GITHUB', 'Expenses:Github')],
+                              category_accounts={
+                                  ('', 'Payment'): 'Assets:Checking:Chase',
+                                  'Shopping': 'Expenses:Shopping',
+                                  ('Shopping', 'Return'): 'Income:Returns',
+                              })
+
+    with chase_file.open() as f:
+        directives = importer.extract(f)
+
+    assert _unindent("""
+        2021-11-04 * "Payment Thank You - Web"
+          Liabilities:Credit-Cards:Chase   4000.00 USD
+          Assets:Checking:Chase           -4000.00 USD
+
+        2021-11-02 * "AMZN MKTP US"
+          Liabilities:Credit-Cards:Chase   12.00 USD
+          Income:Returns                  -12.00 USD
+
+        2021-11-01 * "AMZN MKTP US"
+          Liabilities:Credit-Cards:Chase  -12.00 USD
+          Expenses:Shopping                12.00 USD
+
+        2021-10-30 * "Github"
+          Liabilities:Credit-Cards:Chase  -4.00 USD
+          Expenses:Github                  4.00 USD
+
+        2021-10-29 * "Google *Cloud_02bb66-C"
+          Liabilities:Credit-Cards:Chase  -25.35 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_extracts_export_without_category_and_type_columns(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,4000.00,
+            1234,10/30/2021,10/31/2021,GITHUB,-4.00,
+            """))
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234',
+                              category_accounts={
+                                  'Shopping': 'Expenses:Shopping',
+                                  (None, 'Payment'): 'Assets:Checking:Chase',
+                              })
+
+    with chase_file.open() as f:
+        assert importer.identify(f)
+        directives = importer.extract(f)
+
+    assert _unindent("""
+        2021-11-04 * "Payment Thank You - Web"
+          Liabilities:Credit-Cards:Chase  4000.00 USD
+
+        2021-10-30 * "Github"
+          Liabilities:Credit-Cards:Chase  -4.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_ignores_over_long_rows_of_export_without_category_column(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Amount,Memo
+            1234,10/30/2021,10/31/2021,GITHUB,-4.00,,Shopping,Sale
+            """))
+    importer = CreditImporter(account='Liabilities:Credit-Cards:Chase',
+                              lastfour='1234',
+                              category_accounts={
+                                  'Shopping': 'Expenses:Shopping',
+                              })
+
+    with chase_file.open() as f:
+        directives = importer.extract(f)
+
+    assert _unindent("""
+        2021-10-30 * "Github"
+          Liabilities:Credit-Cards:Chase  -4.00 USD
+        """.rstrip()) == _stringify_directives(directives).strip()
+
+
+def test_columnar_extract_matches_row_extract(tmp_path):
+    chase_file = tmp_path / 'Chase1234_Activity20210103_20210202_20210214.CSV'
+    chase_file.write_text(
+        _unindent("""
+            Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+            1234,11/04/2021,11/04/2021,Payment Thank You - Web,,Payment,4000.00,
+            1234,11/02/2021,11/02/2021,AMZN Mktp US,Shopping,Return,12.00,
+            1234,11/01/2021,11/01/2021,AMZN Mktp US,Shopping,Sale,-12.00,
+            1234,11/01/2021,11/01/2021,AMZN Mktp US,Shopping,Sale,0.00,
+            1234,10/30/2021,10/31/2021,GITHUB,Shopping,Sale,-4.00,
+            """))
+    settings = {
+        'account': 'Liabilities:Credit-Cards:Chase',
+        'lastfour': '1234',
+        'account_patterns': [('GITHUB', 'Expenses:Github')],
+        'category_accounts': {
+            'Shopping': 'Expenses:Shopping',
+            ('Shopping', 'Return'): 'Income:Returns',
+        },
+    }
+
+    with chase_file.open() as f:
+        expected = CreditImporter(**settings).extract(f)
+    with chase_file.open() as f:
+        actual = CreditImporter(**settings, columnar=True).extract(f)
+
+    assert 4 == len(actual)
+    assert expected == actual
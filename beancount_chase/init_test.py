@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import beancount_chase
+
+_SCRIPT = """
+import json
+import sys
+
+import beancount_chase
+loaded = {'package': sorted(sys.modules)}
+beancount_chase.CheckingImporter('Assets:Checking:Chase')
+loaded['importer'] = sorted(sys.modules)
+print(json.dumps(loaded))
+"""
+
+
+def test_loads_submodules_on_first_use():
+    output = subprocess.run([sys.executable, '-c', _SCRIPT],
+                            check=True,
+                            capture_output=True,
+                            text=True).stdout
+    loaded = json.loads(output)
+
+    assert 'beancount_chase.checking' not in loaded['package']
+    assert 'beancount' not in loaded['package']
+    assert 'beancount_chase.checking' in loaded['importer']
+    assert 'beancount_chase.credit' not in loaded['importer']
+    assert 'asyncio' not in loaded['importer']
+    assert 'titlecase' not in loaded['importer']
+
+
+def test_exports_importers():
+    from . import CheckingImporter  # pylint: disable=import-outside-toplevel
+
+    assert CheckingImporter is beancount_chase.CheckingImporter
+    assert {'CheckingImporter', 'CreditImporter'} <= set(dir(beancount_chase))
+    with pytest.raises(AttributeError):
+        beancount_chase.DebitImporter  # pylint: disable=pointless-statement
@@ -0,0 +1,90 @@
+import collections
+import json
+import time
+
+
+class Stats:
+    """Cumulative timings and counters for an importer's extraction stages.
+
+    Importers only create a Stats when instrumentation is enabled. Otherwise
+    they call their stage functions directly, so the uninstrumented path does
+    no extra work.
+    """
+
+    def __init__(self):
+        self.seconds = collections.Counter()
+        self.calls = collections.Counter()
+        self.counts = collections.Counter()
+        self.matches = collections.defaultdict(collections.Counter)
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+        self.counts.clear()
+        self.matches.clear()
+
+    def timed(self, stage, function, on_result=None):
+        """Wrap a function so that its calls are timed and counted.
+
+        Args:
+            stage: Name under which to record the function's calls.
+            function: The function to wrap.
+            on_result: Optional callback that receives each return value.
+
+        Returns:
+            A function that behaves like the wrapped one.
+        """
+
+        def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+            if on_result:
+                on_result(result)
+            return result
+
+        return timed_function
+
+    def timed_iter(self, stage, iterable):
+        """Iterate over an iterable, timing and counting each item it yields.
+
+        Args:
+            stage: Name under which to record the time spent fetching items.
+            iterable: The iterable to wrap.
+
+        Yields:
+            The items of the iterable.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+            self.calls[stage] += 1
+            yield item
+
+    def count(self, name, increment=1):
+        self.counts[name] += increment
+
+    def count_match(self, kind, key):
+        self.matches[kind][key] += 1
+
+    def as_dict(self):
+        return {
+            'seconds': dict(self.seconds),
+            'calls': dict(self.calls),
+            'counts': dict(self.counts),
+            'matches': {
+                kind: dict(counter) for kind, counter in self.matches.items()
+            },
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
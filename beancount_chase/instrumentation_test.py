@@ -0,0 +1,43 @@
+import json
+
+from . import instrumentation
+
+
+def test_timed_records_calls_and_results():
+    stats = instrumentation.Stats()
+    results = []
+    double = stats.timed('double', lambda x: x * 2, results.append)
+
+    assert 6 == double(3)
+    assert 8 == double(4)
+
+    assert 2 == stats.calls['double']
+    assert stats.seconds['double'] >= 0
+    assert [6, 8] == results
+
+
+def test_timed_iter_counts_items():
+    stats = instrumentation.Stats()
+
+    assert ['a', 'b'] == list(stats.timed_iter('read', ['a', 'b']))
+    assert 2 == stats.calls['read']
+
+
+def test_exports_counters_as_json():
+    stats = instrumentation.Stats()
+    stats.count('zero_amount_rows')
+    stats.count_match('account_patterns', 'GITHUB')
+    stats.count_match('account_patterns', 'GITHUB')
+
+    exported = json.loads(stats.to_json())
+
+    assert {'zero_amount_rows': 1} == exported['counts']
+    assert {'account_patterns': {'GITHUB': 2}} == exported['matches']
+
+    stats.reset()
+    assert {
+        'seconds': {},
+        'calls': {},
+        'counts': {},
+        'matches': {}
+    } == stats.as_dict()
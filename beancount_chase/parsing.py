@@ -0,0 +1,64 @@
+import datetime
+import decimal
+
+from beancount.core import number as beancount_number
+
+ZERO = beancount_number.ZERO
+
+
+class DateParser:
+    """Parses MM/DD/YYYY dates, remembering every distinct string it sees.
+
+    An export spans only a few hundred distinct dates, so a parser should live
+    for the duration of one file rather than being shared between files.
+    """
+
+    def __init__(self):
+        self._dates = {}
+
+    def parse(self, date_raw):
+        try:
+            return self._dates[date_raw]
+        except KeyError:
+            date = parse_date(date_raw)
+            self._dates[date_raw] = date
+            return date
+
+
+def parse_date(date_raw):
+    """Parse a date in Chase's MM/DD/YYYY format.
+
+    Args:
+        date_raw: The date string from the CSV.
+
+    Returns:
+        The parsed datetime.date.
+    """
+    if len(date_raw) == 10 and date_raw[2] == '/' and date_raw[5] == '/':
+        month, day, year = date_raw[:2], date_raw[3:5], date_raw[6:]
+        digits = month + day + year
+        if digits.isascii() and digits.isdigit():
+            try:
+                return datetime.date(int(year), int(month), int(day))
+            except ValueError:
+                pass
+    # Fall back to strptime for lenient forms like 1/5/2025 and so that
+    # invalid dates raise the same errors as before.
+    return datetime.datetime.strptime(date_raw, '%m/%d/%Y').date()
+
+
+def parse_number(number_raw):
+    """Parse an amount string from the CSV into a Decimal.
+
+    Args:
+        number_raw: The amount string from the CSV.
+
+    Returns:
+        The same Decimal that beancount's D() would return.
+    """
+    if ',' not in number_raw and ' ' not in number_raw:
+        try:
+            return decimal.Decimal(number_raw)
+        except decimal.InvalidOperation:
+            pass
+    return beancount_number.D(number_raw)
@@ -0,0 +1,43 @@
+import datetime
+import decimal
+
+import pytest
+
+from . import parsing
+
+
+@pytest.mark.parametrize('date_raw, expected', [
+    ('09/13/2021', datetime.date(2021, 9, 13)),
+    ('12/31/1999', datetime.date(1999, 12, 31)),
+    ('1/5/2025', datetime.date(2025, 1, 5)),
+])
+def test_parse_date(date_raw, expected):
+    assert expected == parsing.parse_date(date_raw)
+
+
+@pytest.mark.parametrize('date_raw', ['02/30/2021', '13/01/2021', '+1/01/2021'])
+def test_parse_date_rejects_invalid_dates(date_raw):
+    with pytest.raises(ValueError):
+        parsing.parse_date(date_raw)
+
+
+def test_date_parser_reuses_parsed_dates():
+    date_parser = parsing.DateParser()
+
+    first = date_parser.parse('09/13/2021')
+
+    assert first is date_parser.parse('09/13/2021')
+
+
+@pytest.mark.parametrize('number_raw, expected', [
+    ('-2500.00', decimal.Decimal('-2500.00')),
+    ('1,234.56', decimal.Decimal('1234.56')),
+    ('0.00', parsing.ZERO),
+])
+def test_parse_number(number_raw, expected):
+    assert expected == parsing.parse_number(number_raw)
+
+
+def test_parse_number_rejects_invalid_amounts():
+    with pytest.raises(ValueError):
+        parsing.parse_number('abc')
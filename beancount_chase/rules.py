@@ -0,0 +1,329 @@
+import collections
+import itertools
+import re
+
+from . import cache
+
+# Matches patterns that contain no regex metacharacters, so they match exactly
+# the text they contain.
+_LITERAL_PATTERN = re.compile(r'[^.^$*+?{}\[\]\\|()]+')
+
+_NO_MATCH = float('inf')
+
+# How a rule's regex can be matched, from _classify().
+_EXACT = 'exact'
+_PREFIX = 'prefix'
+_SUBSTRING = 'substring'
+_REGEX = 'regex'
+
+
+class RuleSet:
+    """Finds the account of the first rule that matches a transaction.
+
+    Rules are (regex, account) pairs that match case-insensitively, and earlier
+    rules take priority over later ones. Rules whose regex is a plain ASCII
+    literal are indexed by how they are anchored:
+
+    - Exact rules, such as ^AMAZON WEB SERVICES$, are looked up in a dict.
+    - Prefix rules, such as ^AMAZON, are looked up in a trie.
+    - Unanchored literals are compiled into a single automaton that finds the
+      first matching literal in one pass over each target.
+
+    The remaining rules are only tried as regexes if they come before the best
+    indexed match.
+
+    A RuleSet is immutable, so one can be compiled once and shared by any
+    number of importers. It pickles without its compiled regexes, which are
+    recompiled when they are first needed, so a pickled RuleSet loads without
+    compiling anything. See compile_rules().
+    """
+
+    def __init__(self, account_patterns):
+        """Compile rules.
+
+        Args:
+            account_patterns: An iterable of (regex, account) pairs.
+
+        Raises:
+            re.error: If a rule's regex is invalid.
+        """
+        self._rules = tuple((pattern, account_name)
+                            for pattern, account_name in account_patterns)
+        self._exact = {}
+        prefixes = []
+        literals = []
+        regex_indices = []
+        for index, (pattern, _) in enumerate(self._rules):
+            kind, literal = _classify(pattern)
+            if kind == _EXACT:
+                self._exact.setdefault(literal, index)
+            elif kind == _PREFIX:
+                prefixes.append((index, literal))
+            elif kind == _SUBSTRING:
+                literals.append((index, literal))
+            else:
+                regex_indices.append(index)
+        self._indexed = frozenset(
+            itertools.chain(self._exact.values(),
+                            (index for index, _ in prefixes),
+                            (index for index, _ in literals)))
+        self._regex_indices = tuple(regex_indices)
+        self._prefixes = _PrefixTrie(prefixes) if prefixes else None
+        self._literals = _LiteralAutomaton(literals) if literals else None
+        # Compiled (index, regex) pairs of the rules that must run as regexes,
+        # and of every rule, built on first use. Plain-text regexes are always
+        # valid, so only the others are compiled now to check them.
+        self._regex_rules = self._compile(self._regex_indices)
+        self._all_regex_rules = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_regex_rules'] = None
+        state['_all_regex_rules'] = None
+        return state
+
+    def __eq__(self, other):
+        if not isinstance(other, RuleSet):
+            return NotImplemented
+        return self._rules == other._rules
+
+    def __hash__(self):
+        return hash(self._rules)
+
+    def __repr__(self):
+        return f'RuleSet({list(self._rules)!r})'
+
+    @property
+    def rules(self):
+        """The (regex, account) pairs, in priority order."""
+        return self._rules
+
+    def __len__(self):
+        return len(self._rules)
+
+    def pattern(self, index):
+        return self._rules[index][0]
+
+    def account(self, index):
+        return self._rules[index][1]
+
+    def match(self, *targets):
+        """Finds the account of the first rule that matches any target.
+
+        Args:
+            targets: Strings to match the rules against.
+
+        Returns:
+            The account name of the first matching rule or None if no rule
+            matches.
+        """
+        index = self.first_match(*targets)
+        if index is None:
+            return None
+        return self.account(index)
+
+    def first_match(self, *targets):
+        """Finds the first rule that matches any target.
+
+        Args:
+            targets: Strings to match the rules against.
+
+        Returns:
+            The index of the first matching rule or None if no rule matches.
+        """
+        best = len(self._rules)
+        if all(target.isascii() for target in targets):
+            # Regex case folding matches some non-ASCII characters to ASCII
+            # letters, so the indexes only handle ASCII targets.
+            for target in targets:
+                best = min(best, self._indexed_match(target.lower()))
+            regex_rules = self._regex_rules
+            if regex_rules is None:
+                regex_rules = self._regex_rules = self._compile(
+                    self._regex_indices)
+        else:
+            regex_rules = self._all_regex_rules
+            if regex_rules is None:
+                regex_rules = self._all_regex_rules = self._compile(
+                    range(len(self._rules)))
+
+        for index, regex in regex_rules:
+            if index >= best:
+                break
+            if any(regex.search(target) for target in targets):
+                return index
+
+        if best == len(self._rules):
+            return None
+        return best
+
+    def _compile(self, indices):
+        return [(index, re.compile(self._rules[index][0], re.IGNORECASE))
+                for index in indices]
+
+    def _indexed_match(self, text):
+        if not self._indexed:
+            return _NO_MATCH
+        best = self._exact.get(text, _NO_MATCH)
+        if text.endswith('\n'):
+            # Like a regex's $, an exact rule may match before a final newline.
+            best = min(best, self._exact.get(text[:-1], _NO_MATCH))
+        if self._prefixes:
+            best = min(best, self._prefixes.first_match(text))
+        if self._literals:
+            best = min(best, self._literals.first_match(text))
+        return best
+
+
+def compile_rules(account_patterns, cache_dir=None):
+    """Compile rules into a RuleSet, reusing one saved by an earlier process.
+
+    Args:
+        account_patterns: An iterable of (regex, account) pairs.
+        cache_dir: A directory to save the compiled RuleSet in, or None to
+            always compile it. A saved RuleSet is only reused for the same
+            rules in the same order.
+
+    Returns:
+        A RuleSet of the rules.
+
+    Raises:
+        re.error: If a rule's regex is invalid.
+    """
+    account_patterns = tuple(
+        (pattern, account_name) for pattern, account_name in account_patterns)
+    if cache_dir is None:
+        return RuleSet(account_patterns)
+    disk = cache.DiskCache(cache_dir)
+    key = ('rules', account_patterns)
+    rule_set = disk.get(key)
+    if rule_set is None:
+        rule_set = RuleSet(account_patterns)
+        disk.put(key, rule_set)
+    return rule_set
+
+
+def _classify(pattern):
+    """Classifies a rule's regex by how it could be matched without a regex.
+
+    Args:
+        pattern: The rule's regex.
+
+    Returns:
+        A (kind, literal) pair, where kind is _EXACT, _PREFIX, _SUBSTRING or
+        _REGEX, and literal is the lowercase text to look up, or None for
+        _REGEX.
+    """
+    if not pattern.isascii():
+        return _REGEX, None
+    kind = _SUBSTRING
+    literal = pattern
+    if literal.startswith('^'):
+        kind = _PREFIX
+        literal = literal[1:]
+        if literal.endswith('$'):
+            kind = _EXACT
+            literal = literal[:-1]
+    if not _LITERAL_PATTERN.fullmatch(literal):
+        return _REGEX, None
+    return kind, literal.lower()
+
+
+class _PrefixTrie:
+    """Trie that finds the lowest-indexed literal that starts a text."""
+
+    def __init__(self, literals):
+        self._transitions = [{}]
+        # Lowest rule index among the literals that end at each node.
+        self._outputs = [_NO_MATCH]
+        for index, literal in literals:
+            node = 0
+            for char in literal:
+                next_node = self._transitions[node].get(char)
+                if next_node is None:
+                    next_node = len(self._transitions)
+                    self._transitions.append({})
+                    self._outputs.append(_NO_MATCH)
+                    self._transitions[node][char] = next_node
+                node = next_node
+            self._outputs[node] = min(self._outputs[node], index)
+
+    def first_match(self, text):
+        """Finds the lowest index of any literal that text starts with.
+
+        Args:
+            text: The lowercase string to search.
+
+        Returns:
+            The lowest matching rule index or _NO_MATCH if nothing matches.
+        """
+        transitions = self._transitions
+        outputs = self._outputs
+        node = 0
+        best = outputs[0]
+        for char in text:
+            node = transitions[node].get(char)
+            if node is None:
+                break
+            if outputs[node] < best:
+                best = outputs[node]
+        return best
+
+
+class _LiteralAutomaton:
+    """Aho-Corasick automaton that finds the lowest-indexed literal in text."""
+
+    def __init__(self, literals):
+        self._transitions = [{}]
+        self._fallbacks = [0]
+        # Lowest rule index among the literals that end at each state.
+        self._outputs = [_NO_MATCH]
+        for index, literal in literals:
+            state = 0
+            for char in literal:
+                next_state = self._transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self._transitions)
+                    self._transitions.append({})
+                    self._fallbacks.append(0)
+                    self._outputs.append(_NO_MATCH)
+                    self._transitions[state][char] = next_state
+                state = next_state
+            self._outputs[state] = min(self._outputs[state], index)
+        self._link_fallbacks()
+
+    def _link_fallbacks(self):
+        queue = collections.deque(self._transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._transitions[state].items():
+                fallback = self._fallbacks[state]
+                while fallback and char not in self._transitions[fallback]:
+                    fallback = self._fallbacks[fallback]
+                fallback = self._transitions[fallback].get(char, 0)
+                self._fallbacks[next_state] = fallback
+                self._outputs[next_state] = min(self._outputs[next_state],
+                                                self._outputs[fallback])
+                queue.append(next_state)
+
+    def first_match(self, text):
+        """Finds the lowest index of any literal that occurs in text.
+
+        Args:
+            text: The lowercase string to search.
+
+        Returns:
+            The lowest matching rule index or _NO_MATCH if nothing matches.
+        """
+        transitions = self._transitions
+        fallbacks = self._fallbacks
+        outputs = self._outputs
+        best = _NO_MATCH
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fallbacks[state]
+            state = transitions[state].get(char, 0)
+            if outputs[state] < best:
+                best = outputs[state]
+        return best
@@ -0,0 +1,132 @@
+import pickle
+import random
+import re
+
+import pytest
+
+from . import rules
+
+
+def _naive_first_match(account_patterns, targets):
+    for index, (pattern, _) in enumerate(account_patterns):
+        regex = re.compile(pattern, re.IGNORECASE)
+        if any(regex.search(target) for target in targets):
+            return index
+    return None
+
+
+def test_returns_account_of_first_matching_rule():
+    matcher = rules.RuleSet([
+        ('GITHUB', 'Expenses:Github'),
+        ('Fed.x', 'Expenses:FedEx'),
+        ('fedex', 'Expenses:Shipping'),
+    ])
+
+    assert 'Expenses:FedEx' == matcher.match('FEDEX OFFICE 1234')
+    assert 'Expenses:Github' == matcher.match('Fedex', 'github.com')
+    assert matcher.match('Spotify') is None
+
+
+def test_earlier_regex_rule_beats_later_literal_rule():
+    matcher = rules.RuleSet([
+        ('^amazon web', 'Expenses:Cloud'),
+        ('amazon', 'Expenses:Shopping'),
+    ])
+
+    assert 0 == matcher.first_match('Amazon Web Services')
+    assert 1 == matcher.first_match('AMZN amazon.com')
+
+
+def test_literal_rules_match_non_ascii_targets_like_regexes():
+    # Regex case folding treats the Kelvin sign as a K.
+    matcher = rules.RuleSet([('kiosk', 'Expenses:Kiosk')])
+
+    assert 'Expenses:Kiosk' == matcher.match('\u212aIOSK')
+
+
+def test_exact_and_prefix_rules_keep_priority_order():
+    matcher = rules.RuleSet([
+        ('^amazon web services$', 'Expenses:Cloud'),
+        ('^amazon', 'Expenses:Shopping'),
+        ('^amazon web', 'Expenses:Unreachable'),
+        ('prime$', 'Expenses:Subscriptions'),
+    ])
+
+    assert 0 == matcher.first_match('Amazon Web Services')
+    assert 0 == matcher.first_match('AMAZON WEB SERVICES\n')
+    assert 1 == matcher.first_match('Amazon Web Services LLC')
+    assert 3 == matcher.first_match('AMZN PRIME')
+    assert matcher.first_match('Pay Amazon Web Services') is None
+
+
+def test_matches_overlapping_literals():
+    matcher = rules.RuleSet([
+        ('abcd', 'Expenses:A'),
+        ('bcx', 'Expenses:B'),
+        ('c', 'Expenses:C'),
+    ])
+
+    assert 1 == matcher.first_match('xabcx')
+    assert 2 == matcher.first_match('abcabc')
+
+
+def test_matches_same_rules_as_naive_scan():
+    rng = random.Random(0)
+    words = ['ama', 'amazon', 'zon', 'web', 'git', 'github', 'hub', 'fee']
+    account_patterns = []
+    for i in range(60):
+        word = rng.choice(words)
+        pattern = rng.choice([
+            word, f'^{word}', f'{word}$', f'^{word}$', f'^{word}{word}$',
+            f'{word}.*fee'
+        ])
+        account_patterns.append((pattern, f'Expenses:Rule{i}'))
+    matcher = rules.RuleSet(account_patterns)
+
+    for _ in range(500):
+        targets = tuple(
+            _random_text(rng, words + [' ', 'X'])
+            for _ in range(rng.randint(1, 3)))
+        assert _naive_first_match(account_patterns,
+                                  targets) == matcher.first_match(*targets)
+
+
+def test_pickled_rule_set_loads_without_compiling(monkeypatch):
+    rule_set = rules.RuleSet([
+        ('^amazon web services$', 'Expenses:Cloud'),
+        ('fed.x', 'Expenses:Shipping'),
+    ])
+    pickled = pickle.dumps(rule_set)
+
+    def fail(*args, **kwargs):
+        raise AssertionError(f'compiled {args}, {kwargs}')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(re, 'compile', fail)
+        loaded = pickle.loads(pickled)
+
+    assert rule_set == loaded
+    assert 0 == loaded.first_match('Amazon Web Services')
+    assert 1 == loaded.first_match('FEDEX OFFICE')
+    assert 1 == loaded.first_match('FEDEX CAF\u00c9')
+
+
+def test_compile_rules_reuses_saved_rule_set(tmp_path):
+    account_patterns = [('fed.x', 'Expenses:Shipping')]
+
+    rule_set = rules.compile_rules(account_patterns, tmp_path)
+    assert 1 == len(list(tmp_path.iterdir()))
+    assert rule_set == rules.compile_rules(account_patterns, tmp_path)
+    assert 1 == len(list(tmp_path.iterdir()))
+    assert rules.compile_rules([('fedex', 'Expenses:Shipping')],
+                               tmp_path).rules != rule_set.rules
+    assert 2 == len(list(tmp_path.iterdir()))
+
+
+def test_rejects_invalid_regex():
+    with pytest.raises(re.error):
+        rules.RuleSet([('fed(x', 'Expenses:Shipping')])
+
+
+def _random_text(rng, words):
+    return ''.join(rng.choice(words).upper() for _ in range(rng.randint(0, 5)))
@@ -0,0 +1,108 @@
+import collections
+import csv
+import mmap
+import re
+
+from . import parsing
+
+# A CSV field: either quoted, with doubled quotes as escapes, or bare.
+_FIELD = rb'(?:"(?:[^"]|"")*"|[^,"\r\n]*)'
+
+_NONZERO_DIGIT = re.compile(rb'[1-9]')
+
+_NEWLINE = re.compile(rb'\n')
+
+Summary = collections.namedtuple('Summary',
+                                 ['header', 'rows', 'first_date', 'last_date'])
+
+
+def read_header(path):
+    """Returns the column names of a CSV file, or [] if it is empty."""
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        return next(csv.reader(csv_file), [])
+
+
+def summarize(path, date_column, amount_column):
+    """Summarize a Chase CSV export without parsing it row by row.
+
+    The file is memory-mapped and scanned with a regex that captures only the
+    date and amount fields of each line, so no other field is copied or
+    decoded. Unlike the csv module, the scan assumes that quoted fields do not
+    span lines, which holds for Chase's exports.
+
+    Args:
+        path: Path of the CSV file.
+        date_column: Name of the column that holds the transaction date.
+        amount_column: Name of the column that holds the transaction amount.
+
+    Returns:
+        A Summary of the header, the number of non-blank rows after it, and
+        the earliest and latest dates among rows with a non-zero amount. The
+        dates are None if no row has a non-zero amount.
+
+    Raises:
+        ValueError: If the header lacks the date or amount column.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped.
+            return Summary([], 0, None, None)
+        with mapped:
+            return summarize_buffer(mapped, date_column, amount_column)
+
+
+def read_buffer_header(buffer):
+    """Returns the column names of a CSV held in a bytes-like object."""
+    first_line = bytes(buffer[:_header_end(buffer)]).decode('utf-8')
+    return next(csv.reader([first_line]), [])
+
+
+def summarize_buffer(buffer, date_column, amount_column):
+    """Like summarize(), but for a CSV held in a bytes-like object."""
+    header_end = _header_end(buffer)
+    header = read_buffer_header(buffer)
+    date_index = header.index(date_column)
+    amount_index = header.index(amount_column)
+
+    # The groups capture the two columns in column order.
+    date_group, amount_group = (1, 2) if date_index < amount_index else (2, 1)
+    # Valid amounts without a non-zero digit, like 0.00, are zero.
+    nonzero_digit = _NONZERO_DIGIT.search
+    # Fold each match into the count and the dates as it is found, rather
+    # than building a list of every row's fields.
+    row_count = 0
+    dates = set()
+    add_date = dates.add
+    rows = _row_pattern(date_index, amount_index).finditer(buffer, header_end)
+    for row_count, row in enumerate(rows, 1):
+        amount_raw = row[amount_group]
+        if amount_raw and nonzero_digit(amount_raw):
+            add_date(row[date_group])
+
+    if not dates:
+        return Summary(header, row_count, None, None)
+    parsed_dates = [
+        parsing.parse_date(date_raw.strip(b'"').decode('utf-8'))
+        for date_raw in dates
+    ]
+    return Summary(header, row_count, min(parsed_dates), max(parsed_dates))
+
+
+def _header_end(buffer):
+    newline = _NEWLINE.search(buffer)
+    return newline.end() if newline else len(buffer)
+
+
+def _row_pattern(*indices):
+    """Compile a regex that matches each non-blank line of a CSV.
+
+    Lines with more fields than the largest index capture the fields at the
+    indices, in column order. Shorter lines match with every group empty.
+    """
+    fields = [
+        b'(%s)' % _FIELD if index in indices else _FIELD
+        for index in range(max(indices) + 1)
+    ]
+    return re.compile(rb'^(?:%s[^\r\n]*|[^\r\n]+)' % b','.join(fields),
+                      re.MULTILINE)
@@ -0,0 +1,59 @@
+import datetime
+import textwrap
+
+from . import scan
+
+
+def _write(tmp_path, text):
+    path = tmp_path / 'export.csv'
+    path.write_text(textwrap.dedent(text).lstrip())
+    return str(path)
+
+
+def test_summarize_skips_zero_amounts_and_blank_lines(tmp_path):
+    path = _write(
+        tmp_path, """
+        Details,Posting Date,Description,Amount,Type
+        DEBIT,09/14/2021,"FEE, MONTHLY",0.00,FEE_TRANSACTION
+
+        DEBIT,09/13/2021,"Transfer, ""X"" Inc",-2500.00,ACCT_XFER
+        DEBIT,08/31/2021,"MONTHLY SERVICE FEE","-1,015.00",FEE_TRANSACTION
+        DEBIT,08/30/2021
+        """)
+
+    summary = scan.summarize(path, 'Posting Date', 'Amount')
+    assert ['Details', 'Posting Date', 'Description', 'Amount',
+            'Type'] == summary.header
+    assert 4 == summary.rows
+    assert datetime.date(2021, 8, 31) == summary.first_date
+    assert datetime.date(2021, 9, 13) == summary.last_date
+
+
+def test_summarize_reads_amount_before_date(tmp_path):
+    path = _write(
+        tmp_path, """
+        Amount,Date
+        1.00,01/02/2024
+        -0.00,01/03/2024
+        """)
+
+    summary = scan.summarize(path, 'Date', 'Amount')
+    assert datetime.date(2024, 1, 2) == summary.first_date
+    assert datetime.date(2024, 1, 2) == summary.last_date
+
+
+def test_summarize_empty_file(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_bytes(b'')
+
+    summary = scan.summarize(str(path), 'Date', 'Amount')
+    assert scan.Summary([], 0, None, None) == summary
+
+
+def test_read_header(tmp_path):
+    path = _write(tmp_path, """
+        Amount,Date
+        1.00,01/02/2024
+        """)
+
+    assert ['Amount', 'Date'] == scan.read_header(path)
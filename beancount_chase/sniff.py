@@ -0,0 +1,55 @@
+from . import cache
+from . import scan
+
+CHECKING = 'checking'
+CREDIT = 'credit'
+
+# Header columns that each kind of Chase export must have. Checking exports
+# date their rows by 'Posting Date' and credit card exports by 'Transaction
+# Date', so no header matches both.
+_SIGNATURES = {
+    CHECKING: frozenset(['Posting Date', 'Description', 'Amount', 'Type']),
+    CREDIT: frozenset(['Transaction Date', 'Description', 'Amount']),
+}
+
+# Number of files whose format is remembered.
+_VERDICT_CACHE_SIZE = 1024
+
+_MISSING = object()
+
+_verdicts = cache.LruCache(_VERDICT_CACHE_SIZE)
+
+
+def detect_format(path):
+    """Tell what kind of Chase export a file is from its header alone.
+
+    Only the first line of the file is read, and the verdict is remembered
+    until the file's size or modification time changes, so every importer
+    can call this from identify() without rereading the file.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        CHECKING or CREDIT, or None if the header matches neither.
+    """
+    key = cache.stat_key(path)
+    verdict = _verdicts.get(key, _MISSING)
+    if verdict is _MISSING:
+        verdict = match_header(scan.read_header(path))
+        _verdicts.put(key, verdict)
+    return verdict
+
+
+def match_header(header):
+    """Returns CHECKING or CREDIT for a header's column names, or None."""
+    columns = set(header)
+    for export_format, signature in _SIGNATURES.items():
+        if signature <= columns:
+            return export_format
+    return None
+
+
+def clear_cache():
+    """Forget every remembered verdict."""
+    _verdicts.clear()
@@ -0,0 +1,51 @@
+import os
+
+from . import sniff
+
+
+def _write(tmp_path, header):
+    path = tmp_path / 'Chase1234_Activity_20240101.CSV'
+    path.write_text(f'{header}\n')
+    return str(path)
+
+
+def test_detects_checking_export(tmp_path):
+    path = _write(
+        tmp_path,
+        'Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #')
+
+    assert sniff.CHECKING == sniff.detect_format(path)
+
+
+def test_detects_credit_export(tmp_path):
+    path = _write(
+        tmp_path,
+        'Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo')
+
+    assert sniff.CREDIT == sniff.detect_format(path)
+
+
+def test_detects_checking_export_without_balance_column(tmp_path):
+    path = _write(tmp_path, 'Details,Posting Date,Description,Amount,Type')
+
+    assert sniff.CHECKING == sniff.detect_format(path)
+
+
+def test_detects_credit_export_without_category_column(tmp_path):
+    path = _write(tmp_path,
+                  'Card,Transaction Date,Post Date,Description,Amount')
+
+    assert sniff.CREDIT == sniff.detect_format(path)
+
+
+def test_detects_unknown_export(tmp_path):
+    assert sniff.detect_format(_write(tmp_path, 'Date,Amount')) is None
+
+
+def test_redetects_format_after_file_changes(tmp_path):
+    path = _write(tmp_path, 'Date,Amount')
+    assert sniff.detect_format(path) is None
+
+    _write(tmp_path, 'Details,Posting Date,Description,Amount,Type,Balance')
+    os.utime(path, ns=(0, 0))
+    assert sniff.CHECKING == sniff.detect_format(path)
@@ -0,0 +1,124 @@
+import hashlib
+import io
+import os
+
+from . import cache
+from . import scan
+from . import sniff
+
+
+class Source:
+    """A Chase export to import, either a file on disk or bytes in memory.
+
+    Importers accept anything that resolve() does, and wrap it in a Source
+    so that the rest of the pipeline need not care where the export lives.
+    """
+
+    def __init__(self, name, path=None, contents=None):
+        """Describe an export.
+
+        Args:
+            name: The filename to report in the metadata of directives and to
+                identify the export by.
+            path: Path of the export on disk, or None if it is in memory.
+            contents: The export's bytes if it is in memory, as any
+                bytes-like object.
+        """
+        if (path is None) == (contents is None):
+            raise ValueError('exactly one of path and contents is required')
+        self.name = name
+        self.path = path
+        self.contents = contents
+
+    def open(self):
+        """Returns a text stream of the export, for use in a with statement."""
+        if self.path is not None:
+            return open(self.path, encoding='utf-8')
+        # BytesIO shares rather than copies the memory of a bytes object.
+        return io.TextIOWrapper(io.BytesIO(self.contents), encoding='utf-8')
+
+    def cache_key(self):
+        """Returns a key that changes whenever the export's contents change."""
+        if self.path is not None:
+            path, _, size, digest = cache.file_key(self.path)
+            return path, size, digest
+        return (self.name, len(self.contents),
+                hashlib.sha256(self.contents).hexdigest())
+
+    def detect_format(self):
+        """Returns the export's sniff format from its header."""
+        if self.path is not None:
+            return sniff.detect_format(self.path)
+        return sniff.match_header(scan.read_buffer_header(self.contents))
+
+    def summarize(self, date_column, amount_column):
+        """Returns the export's scan.Summary."""
+        if self.path is not None:
+            return scan.summarize(self.path, date_column, amount_column)
+        return scan.summarize_buffer(self.contents, date_column, amount_column)
+
+
+def resolve(file):
+    """Wrap anything an importer accepts in a Source.
+
+    Args:
+        file: One of:
+            - A Source.
+            - A path, as an os.PathLike object such as pathlib.Path.
+            - A beancount file memo, or an open file backed by a file
+              descriptor, whose name is the path of a file on disk. The file
+              is reopened by path, so its position is left untouched.
+            - Any other binary or text stream, such as io.BytesIO or
+              io.StringIO, whose contents are read from the start. Its name,
+              if any, only labels the export, even if a file has that name.
+            - The export's contents, as bytes, bytearray or memoryview.
+
+    Returns:
+        A Source.
+
+    Raises:
+        TypeError: If the file is none of the above. A str is rejected,
+            because it could be either a path or an export's contents.
+    """
+    if isinstance(file, Source):
+        return file
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return Source('<bytes>', contents=file)
+    if isinstance(file, str):
+        raise TypeError(
+            f'cannot tell whether str {file[:40]!r} is a path or CSV contents; '
+            'pass a pathlib.Path, or wrap contents in io.StringIO or '
+            'sources.Source(name, contents=...)')
+    if isinstance(file, os.PathLike):
+        return Source(os.fspath(file), path=os.fspath(file))
+
+    name = getattr(file, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name) and _is_on_disk(file):
+        return Source(name, path=name)
+    if not isinstance(name, str):
+        name = '<stream>'
+    if isinstance(file, io.BytesIO):
+        return Source(name, contents=file.getvalue())
+    if isinstance(file, io.StringIO):
+        return Source(name, contents=file.getvalue().encode('utf-8'))
+    if hasattr(file, 'read'):
+        if file.seekable():
+            file.seek(0)
+        contents = file.read()
+        if isinstance(contents, str):
+            contents = contents.encode('utf-8')
+        return Source(name, contents=contents)
+    raise TypeError(f'cannot import from {type(file).__name__}')
+
+
+def _is_on_disk(file):
+    # A beancount file memo has no read(); it only names a file. A stream
+    # holds the file's contents only if the OS backs it; an upload such as a
+    # BytesIO may carry any name.
+    if not hasattr(file, 'read'):
+        return True
+    try:
+        file.fileno()
+    except (OSError, ValueError):
+        return False
+    return True
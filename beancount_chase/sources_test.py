@@ -0,0 +1,86 @@
+import datetime
+import io
+import pathlib
+
+import pytest
+from beancount.ingest import cache
+
+from . import sniff
+from . import sources
+
+_CSV = (
+    'Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n'
+    '1234,10/29/2021,10/31/2021,GITHUB,Services,Sale,-25.35,\n')
+
+
+def test_resolves_contents_in_memory():
+    for contents, name in [(_CSV.encode('utf-8'), '<bytes>'),
+                           (io.BytesIO(_CSV.encode('utf-8')), '<stream>'),
+                           (io.StringIO(_CSV), '<stream>')]:
+        source = sources.resolve(contents)
+
+        assert name == source.name
+        assert source.path is None
+        with source.open() as csv_file:
+            assert _CSV == csv_file.read()
+
+
+def test_resolves_files_on_disk_by_path(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_text(_CSV)
+
+    assert str(path) == sources.resolve(path).path
+    with path.open() as f:
+        f.readline()
+        assert str(path) == sources.resolve(f).path
+        assert _CSV.splitlines(keepends=True)[1] == f.readline()
+
+
+def test_reads_named_uploads_instead_of_the_file_they_name(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_text(_CSV.replace('25.35', '99.99'))
+    upload = io.BytesIO(_CSV.encode('utf-8'))
+    upload.name = str(path)
+
+    source = sources.resolve(upload)
+
+    assert str(path) == source.name
+    assert source.path is None
+    assert _CSV.encode('utf-8') == bytes(source.contents)
+
+
+def test_resolves_file_memos_by_path(tmp_path):
+    path = tmp_path / 'export.csv'
+    path.write_text(_CSV)
+
+    assert str(path) == sources.resolve(cache.get_file(str(path))).path
+
+
+def test_reads_unnamed_streams_from_start():
+    stream = io.BytesIO(_CSV.encode('utf-8'))
+    stream.seek(10)
+
+    assert _CSV.encode('utf-8') == bytes(sources.resolve(stream).contents)
+
+
+def test_scans_contents_in_memory():
+    source = sources.Source('upload.csv', contents=_CSV.encode('utf-8'))
+
+    assert sniff.CREDIT == source.detect_format()
+    assert datetime.date(2021, 10,
+                         29) == source.summarize('Transaction Date',
+                                                 'Amount').last_date
+
+
+def test_cache_key_changes_with_contents():
+    assert sources.resolve(io.StringIO(_CSV)).cache_key() != sources.resolve(
+        io.StringIO(_CSV.replace('25.35', '25.36'))).cache_key()
+
+
+def test_rejects_unsupported_types():
+    with pytest.raises(TypeError):
+        sources.resolve(42)
+    with pytest.raises(TypeError, match='pathlib.Path'):
+        sources.resolve('Chase1234_Activity_20220219.CSV')
+    with pytest.raises(ValueError):
+        sources.Source('export.csv', path=pathlib.Path('x'), contents=b'')
@@ -0,0 +1,160 @@
+import collections
+import datetime
+import hashlib
+
+from beancount.core import data
+
+# Replace the two sides of a transfer with one two-legged transaction.
+MERGE = 'merge'
+# Keep both sides of a transfer and tag them with a shared link, which is
+# derived from the two sides so that it is the same in every run.
+LINK = 'link'
+
+_MODES = (MERGE, LINK)
+
+DEFAULT_TOLERANCE_DAYS = 3
+
+
+def match_transfers(directives,
+                    transfer_accounts,
+                    mode=LINK,
+                    tolerance_days=DEFAULT_TOLERANCE_DAYS):
+    """Pair up the two sides of transfers between imported accounts.
+
+    A transfer from checking to a credit card appears once in each account's
+    export, for example as a checking withdrawal and a card payment. Only
+    the account pairs in transfer_accounts are searched, and only in their
+    direction: the source side posts a negative amount to the source account,
+    and the destination side the opposite amount, in the same currency, to
+    the destination account, within tolerance_days of each other. A side
+    must be unbalanced, or balanced only by a posting to the other side's
+    account, so transactions that account_patterns already categorized are
+    left alone.
+
+    Amounts alone cannot tell a transfer from an unrelated transaction of
+    the same amount, such as a card refund a day after a checking purchase.
+    LINK is therefore the default, so that a wrong match adds a link rather
+    than deleting a transaction.
+
+    Transactions are indexed by amount and visited in date order, so matching
+    takes near-linear time. Each transaction is matched at most once, to the
+    earliest eligible side.
+
+    Args:
+        directives: Directives from any number of importers.
+        transfer_accounts: Iterable of (source, destination) account name
+            pairs that transfers move money between, such as
+            ('Assets:Checking:Chase', 'Liabilities:Credit-Cards:Chase') for
+            card payments from checking.
+        mode: LINK to keep both sides and add a shared link to each, or MERGE
+            to replace each pair with one transaction. The link is a digest
+            of the two sides' dates, accounts and amounts, so importing the
+            same exports again links the pair the same way.
+        tolerance_days: How many days apart the two sides may be posted.
+
+    Returns:
+        A new list of the directives in their original order. A merged
+        transaction takes the place of whichever side came first, with the
+        date, payee, narration and metadata of the side posted first.
+    """
+    if mode not in _MODES:
+        raise ValueError(
+            f'invalid transfers mode: {mode!r}, expected one of {_MODES}')
+    routes = frozenset(
+        (source, destination) for source, destination in transfer_accounts)
+    sources = frozenset(source for source, _ in routes)
+    destinations = frozenset(destination for _, destination in routes)
+    directives = list(directives)
+    tolerance = datetime.timedelta(days=tolerance_days)
+    candidates = sorted((i for i, directive in enumerate(directives)
+                         if _is_candidate(directive, sources, destinations)),
+                        key=lambda i: directives[i].date)
+
+    # Unmatched transactions by the (currency, number) of their first posting,
+    # oldest first, as indices into directives.
+    pending = collections.defaultdict(collections.deque)
+    pairs = []
+    for i in candidates:
+        transaction = directives[i]
+        units = transaction.postings[0].units
+        unmatched = pending[(units.currency, -units.number)]
+        earliest = transaction.date - tolerance
+        while unmatched and directives[unmatched[0]].date < earliest:
+            unmatched.popleft()
+        for position, j in enumerate(unmatched):
+            if _are_sides(directives[j], transaction, routes):
+                del unmatched[position]
+                pairs.append((j, i))
+                break
+        else:
+            pending[(units.currency, units.number)].append(i)
+
+    # How many pairs with the same sides have been linked, so that identical
+    # transfers on the same day get different links.
+    occurrences = collections.Counter()
+    for first, second in pairs:
+        if mode == LINK:
+            sides = '\0'.join(
+                sorted([
+                    _describe(directives[first]),
+                    _describe(directives[second])
+                ]))
+            occurrences[sides] += 1
+            link = _link(sides, occurrences[sides])
+            for i in (first, second):
+                directives[i] = directives[i]._replace(
+                    links=directives[i].links | {link})
+            continue
+        merged = _merge(directives[first], directives[second])
+        directives[min(first, second)] = merged
+        directives[max(first, second)] = None
+    return [directive for directive in directives if directive is not None]
+
+
+def _is_candidate(directive, sources, destinations):
+    """Returns whether a directive may be the source or destination side."""
+    if not isinstance(directive, data.Transaction):  # pylint: disable=isinstance-second-argument-not-valid-type
+        return False
+    if not 1 <= len(directive.postings) <= 2:
+        return False
+    posting = directive.postings[0]
+    if posting.units.number < 0:
+        return posting.account in sources
+    return posting.account in destinations
+
+
+def _describe(side):
+    posting = side.postings[0]
+    return f'{side.date}\0{posting.account}\0{posting.units}'
+
+
+def _link(sides, occurrence):
+    digest = hashlib.sha256(f'{sides}\0{occurrence}'.encode('utf-8'))
+    return f'transfer-{digest.hexdigest()[:16]}'
+
+
+def _are_sides(first, second, routes):
+    account = first.postings[0].account
+    other_account = second.postings[0].account
+    if first.postings[0].units.number < 0:
+        route = (account, other_account)
+    else:
+        route = (other_account, account)
+    if route not in routes:
+        return False
+    if not _balances_only_to(first, other_account):
+        return False
+    return _balances_only_to(second, account)
+
+
+def _balances_only_to(transaction, account):
+    return all(
+        posting.account == account for posting in transaction.postings[1:])
+
+
+def _merge(first, second):
+    return first._replace(
+        tags=first.tags | second.tags,
+        links=first.links | second.links,
+        postings=[first.postings[0], second.postings[0]],
+    )
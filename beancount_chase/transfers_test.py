@@ -0,0 +1,198 @@
+import datetime
+
+import pytest
+from beancount.core import amount
+from beancount.core import data
+from beancount.core import number
+
+from . import transfers
+
+_CHECKING = 'Assets:Checking:Chase'
+_CREDIT = 'Liabilities:Credit-Cards:Chase'
+
+# Card payments from checking.
+_ROUTES = [(_CHECKING, _CREDIT)]
+
+
+def _transaction(date, payee, *postings):
+    postings = [
+        data.Posting(account=account,
+                     units=amount.Amount(number.D(units), 'USD'),
+                     cost=None,
+                     price=None,
+                     flag=None,
+                     meta=None) for account, units in postings
+    ]
+    return data.Transaction(meta=data.new_metadata('export.csv', 1),
+                            date=datetime.date.fromisoformat(date),
+                            flag='*',
+                            payee=payee,
+                            narration=None,
+                            tags=data.EMPTY_SET,
+                            links=data.EMPTY_SET,
+                            postings=postings)
+
+
+def _describe(directives):
+    return [(d.date.isoformat(), d.payee, sorted(d.links), [
+        (p.account, str(p.units)) for p in d.postings
+    ]) for d in directives]
+
+
+def test_merges_two_sides_of_transfer():
+    directives = [
+        _transaction('2021-11-08', 'Payment Thank You', (_CREDIT, '357.51')),
+        _transaction('2021-11-06', 'Chase Credit CRD', (_CHECKING, '-357.51')),
+        _transaction('2021-11-07', 'Github', (_CHECKING, '-4.00')),
+    ]
+
+    assert [
+        ('2021-11-06', 'Chase Credit CRD', [], [(_CHECKING, '-357.51 USD'),
+                                                (_CREDIT, '357.51 USD')]),
+        ('2021-11-07', 'Github', [], [(_CHECKING, '-4.00 USD')]),
+    ] == _describe(
+        transfers.match_transfers(directives, _ROUTES, mode=transfers.MERGE))
+
+
+def test_links_two_sides_of_transfer():
+    directives = [
+        _transaction('2021-11-06', 'Chase Credit CRD', (_CHECKING, '-357.51')),
+        _transaction('2021-11-08', 'Payment Thank You', (_CREDIT, '357.51')),
+    ]
+
+    linked = transfers.match_transfers(directives, _ROUTES)
+
+    assert [
+        ('2021-11-06', 'Chase Credit CRD', [(_CHECKING, '-357.51 USD')]),
+        ('2021-11-08', 'Payment Thank You', [(_CREDIT, '357.51 USD')]),
+    ] == [(date, payee, postings)
+          for date, payee, _, postings in _describe(linked)]
+    assert 1 == len(linked[0].links)
+    assert linked[0].links == linked[1].links
+    assert next(iter(linked[0].links)).startswith('transfer-')
+
+
+def test_links_depend_on_sides_not_on_other_transfers():
+    github = _transaction('2021-11-07', 'Github', (_CHECKING, '-4.00'))
+    first = [
+        _transaction('2021-11-06', 'Chase Credit CRD', (_CHECKING, '-357.51')),
+        _transaction('2021-11-08', 'Payment Thank You', (_CREDIT, '357.51')),
+    ]
+    second = [
+        _transaction('2021-11-01', 'Chase Credit CRD', (_CHECKING, '-25.00')),
+        _transaction('2021-11-02', 'Payment Thank You', (_CREDIT, '25.00')),
+    ]
+
+    alone = transfers.match_transfers(first, _ROUTES)
+    together = transfers.match_transfers([github, *second, *first[::-1]],
+                                         _ROUTES)
+
+    assert alone[0].links == together[4].links
+    assert together[1].links == together[2].links
+    assert together[1].links != together[3].links
+
+
+def test_links_identical_transfers_differently():
+    directives = [
+        _transaction('2021-11-06', 'Chase Credit CRD', (_CHECKING, '-25.00')),
+        _transaction('2021-11-06', 'Chase Credit CRD', (_CHECKING, '-25.00')),
+        _transaction('2021-11-07', 'Payment Thank You', (_CREDIT, '25.00')),
+        _transaction('2021-11-07', 'Payment Thank You', (_CREDIT, '25.00')),
+    ]
+
+    linked = transfers.match_transfers(directives, _ROUTES)
+
+    assert linked[0].links == linked[2].links
+    assert linked[1].links == linked[3].links
+    assert linked[0].links != linked[1].links
+
+
+def test_does_not_match_sides_outside_tolerance():
+    directives = [
+        _transaction('2021-11-01', 'Chase Credit CRD', (_CHECKING, '-357.51')),
+        _transaction('2021-11-08', 'Payment Thank You', (_CREDIT, '357.51')),
+    ]
+
+    assert directives == transfers.match_transfers(directives,
+                                                   _ROUTES,
+                                                   mode=transfers.MERGE,
+                                                   tolerance_days=6)
+    assert 1 == len(
+        transfers.match_transfers(directives,
+                                  _ROUTES,
+                                  mode=transfers.MERGE,
+                                  tolerance_days=7))
+
+
+def test_does_not_match_same_account_or_categorized_transactions():
+    directives = [
+        _transaction('2021-11-06', 'Refund', (_CHECKING, '25.00')),
+        _transaction('2021-11-06', 'Github', (_CHECKING, '-25.00')),
+        _transaction('2021-11-06', 'Fedex', (_CREDIT, '-10.00'),
+                     ('Expenses:Postage', '10.00')),
+        _transaction('2021-11-06', 'Refund', (_CHECKING, '10.00')),
+    ]
+
+    assert directives == transfers.match_transfers(directives,
+                                                   _ROUTES,
+                                                   mode=transfers.MERGE)
+
+
+def test_merges_side_already_balanced_to_other_account():
+    directives = [
+        _transaction('2021-11-06', 'Chase Credit CRD', (_CHECKING, '-357.51'),
+                     (_CREDIT, '357.51')),
+        _transaction('2021-11-07', 'Payment Thank You', (_CREDIT, '357.51')),
+    ]
+
+    assert [
+        ('2021-11-06', 'Chase Credit CRD', [], [(_CHECKING, '-357.51 USD'),
+                                                (_CREDIT, '357.51 USD')]),
+    ] == _describe(
+        transfers.match_transfers(directives, _ROUTES, mode=transfers.MERGE))
+
+
+def test_matches_each_side_once_in_date_order():
+    directives = [
+        _transaction('2021-11-01', 'Payment 1', (_CHECKING, '-100.00')),
+        _transaction('2021-11-02', 'Payment 2', (_CHECKING, '-100.00')),
+        _transaction('2021-11-03', 'Thank You', (_CREDIT, '100.00')),
+    ]
+
+    assert [
+        ('2021-11-01', 'Payment 1', [], [(_CHECKING, '-100.00 USD'),
+                                         (_CREDIT, '100.00 USD')]),
+        ('2021-11-02', 'Payment 2', [], [(_CHECKING, '-100.00 USD')]),
+    ] == _describe(
+        transfers.match_transfers(directives, _ROUTES, mode=transfers.MERGE))
+
+
+def test_leaves_same_amount_non_transfers_alone():
+    directives = [
+        _transaction('2021-11-01', 'Payroll Deposit', (_CHECKING, '100.00')),
+        _transaction('2021-11-02', 'Amazon', (_CREDIT, '-100.00')),
+        _transaction('2021-11-03', 'Rent', (_CHECKING, '-50.00')),
+        _transaction('2021-11-03', 'Fedex', (_CREDIT, '-50.00')),
+        _transaction('2021-11-04', 'Refund', ('Assets:Savings', '50.00')),
+    ]
+
+    assert directives == transfers.match_transfers(directives,
+                                                   _ROUTES,
+                                                   mode=transfers.MERGE)
+
+
+def test_links_by_default():
+    directives = [
+        _transaction('2021-11-06', 'Chase Credit CRD', (_CHECKING, '-357.51')),
+        _transaction('2021-11-08', 'Payment Thank You', (_CREDIT, '357.51')),
+    ]
+
+    linked = transfers.match_transfers(directives, _ROUTES)
+
+    assert 2 == len(linked)
+    assert linked[0].links == linked[1].links != data.EMPTY_SET
+
+
+def test_rejects_invalid_mode():
+    with pytest.raises(ValueError):
+        transfers.match_transfers([], _ROUTES, mode='both')
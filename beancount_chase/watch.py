@@ -0,0 +1,219 @@
+"""Import new Chase downloads from a directory as they appear.
+
+Usage:
+    python -m beancount_chase.watch config.py ~/Downloads ledger.beancount
+"""
+import argparse
+import collections
+import json
+import os
+import re
+import runpy
+import time
+
+from . import batch
+from . import writer
+
+_FORMAT_VERSION = 1
+
+DEFAULT_INTERVAL_SECONDS = 5.0
+
+# Names of Chase checking and credit card exports. Anything else is skipped
+# without a stat() or an identify() call.
+_EXPORT_NAME = re.compile(r'Chase\d{4}_Activity.*\.CSV', re.IGNORECASE)
+
+# The outcome of a poll: the paths of exports whose directives were written,
+# and a dict from the path of each export that failed to its error.
+PollResult = collections.namedtuple('PollResult', ['imported', 'failed'])
+
+
+class Watcher:
+    """Imports new and changed exports from a directory into a ledger file.
+
+    The watcher indexes the modification time and size of every export in
+    the directory, so each poll costs one scandir() and only exports that
+    changed since they were imported are extracted. A download that is still
+    being written keeps changing, so an export is only imported once two
+    polls in a row see the same modification time and size. The importers
+    live as long as the watcher, so their compiled rules and caches stay
+    warm between polls.
+
+    An export that changes is extracted again in full. Share a
+    watermarks.WatermarkStore between the importers, and pass it to the
+    watcher to commit once each export's directives are appended, so that
+    only its new rows are appended.
+    """
+
+    def __init__(self,
+                 directory,
+                 importers,
+                 output,
+                 *,
+                 index_path=None,
+                 watermarks=None):
+        """Start watching a directory.
+
+        Args:
+            directory: The directory that Chase exports are downloaded to.
+            importers: Configured CheckingImporter and CreditImporter
+                instances. Every importer that identifies an export extracts
+                it, as bean-extract does.
+            output: Path of the beancount file to append directives to.
+            index_path: JSON file that persists the index across restarts, so
+                that exports imported before a restart are not imported
+                again. If None, every export is imported on the second poll,
+                once it has settled.
+            watermarks: The watermarks.WatermarkStore that the importers
+                share, if any. It is committed after each export's directives
+                are appended, and its pending rows are discarded if the
+                export fails to extract or append.
+        """
+        self._directory = directory
+        self._importers = importers
+        self._output = output
+        self._index_path = index_path
+        self._watermarks = watermarks
+        # The (modification time, size) of each export when it was last
+        # imported, by filename.
+        self._index = {}
+        # The (modification time, size) of each export seen by the previous
+        # poll, by filename.
+        self._seen = {}
+        if index_path and os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                self._load(json.load(f))
+
+    def _load(self, state):
+        version = state.get('version')
+        if version != _FORMAT_VERSION:
+            raise ValueError(f'unsupported watch index version: {version}')
+        self._index = {
+            name: tuple(signature) for name, signature in state['files'].items()
+        }
+
+    def _save(self):
+        if not self._index_path:
+            return
+        state = {
+            'version': _FORMAT_VERSION,
+            'files': {
+                name: list(signature)
+                for name, signature in sorted(self._index.items())
+            },
+        }
+        temporary_path = f'{self._index_path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temporary_path, self._index_path)
+
+    def poll(self):
+        """Import the exports that are new or changed and have settled.
+
+        Exports are imported in filename order, and each one's directives are
+        appended to the output before the next one is extracted. An export
+        that fails to extract is reported and not retried until it changes
+        again.
+
+        Returns:
+            A PollResult.
+        """
+        seen = {}
+        settled = []
+        with os.scandir(self._directory) as entries:
+            for entry in entries:
+                if not _EXPORT_NAME.fullmatch(entry.name):
+                    continue
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                seen[entry.name] = signature
+                if self._index.get(entry.name) == signature:
+                    continue
+                if self._seen.get(entry.name) == signature:
+                    settled.append(entry.name)
+        self._seen = seen
+
+        # Exports that were deleted drop out of the index.
+        index = {
+            name: signature
+            for name, signature in self._index.items()
+            if name in seen
+        }
+        result = PollResult(imported=[], failed={})
+        for name in sorted(settled):
+            index[name] = seen[name]
+            path = os.path.abspath(os.path.join(self._directory, name))
+            try:
+                directives = batch.extract_file(path, self._importers)
+                if directives:
+                    with open(self._output, 'a', encoding='utf-8') as f:
+                        writer.write_entries(directives, f, padded=False)
+            except (OSError, ValueError, KeyError) as e:
+                if self._watermarks is not None:
+                    self._watermarks.discard()
+                result.failed[path] = e
+                continue
+            if self._watermarks is not None:
+                self._watermarks.commit()
+            if directives:
+                result.imported.append(path)
+
+        if index != self._index:
+            self._index = index
+            self._save()
+        return result
+
+    def run(self, interval=DEFAULT_INTERVAL_SECONDS, polls=None):
+        """Poll the directory until interrupted.
+
+        Args:
+            interval: Seconds to wait between polls.
+            polls: Number of polls to run, or None to poll forever.
+
+        Yields:
+            The PollResult of each poll.
+        """
+        count = 0
+        while polls is None or count < polls:
+            if count:
+                time.sleep(interval)
+            yield self.poll()
+            count += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('config',
+                        help='bean-extract config file that defines CONFIG, '
+                        'and optionally WATERMARKS, the WatermarkStore that '
+                        'its importers share')
+    parser.add_argument('directory', help='directory to watch for downloads')
+    parser.add_argument('output', help='beancount file to append to')
+    parser.add_argument('--index',
+                        help='JSON file that remembers imported exports '
+                        'across restarts')
+    parser.add_argument('--interval',
+                        type=float,
+                        default=DEFAULT_INTERVAL_SECONDS,
+                        help='seconds between polls')
+    args = parser.parse_args(argv)
+
+    config = runpy.run_path(args.config)
+    watcher = Watcher(args.directory,
+                      config['CONFIG'],
+                      args.output,
+                      index_path=args.index,
+                      watermarks=config.get('WATERMARKS'))
+    try:
+        for result in watcher.run(args.interval):
+            for path in result.imported:
+                print(f'imported {path}')
+            for path, error in result.failed.items():
+                print(f'failed to import {path}: {error}')
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
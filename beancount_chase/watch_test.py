@@ -0,0 +1,127 @@
+import os
+import textwrap
+
+from . import CheckingImporter
+from . import watch
+from . import watermarks
+
+_HEADER = 'Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #'
+_FEE = 'DEBIT,09/14/2021,"MONTHLY SERVICE FEE",-15.00,FEE_TRANSACTION,4310.75,,'
+_DEPOSIT = 'CREDIT,09/15/2021,"REMOTE ONLINE DEPOSIT",100.00,DEPOSIT,4410.75,,'
+
+
+def _unindent(indented):
+    return textwrap.dedent(indented).lstrip()
+
+
+def _write_export(path, *rows):
+    path.write_text('\n'.join((_HEADER, *rows)) + '\n')
+    # Bump the modification time past the filesystem's timestamp resolution.
+    signature = os.stat(path)
+    os.utime(path,
+             ns=(signature.st_atime_ns, signature.st_mtime_ns + 1_000_000_000))
+
+
+def _watcher(tmp_path, store=None):
+    importers = [
+        CheckingImporter(account='Assets:Checking:Chase',
+                         lastfour='1234',
+                         watermarks=store)
+    ]
+    return watch.Watcher(tmp_path / 'downloads',
+                         importers,
+                         tmp_path / 'ledger.beancount',
+                         index_path=tmp_path / 'index.json',
+                         watermarks=store)
+
+
+def test_imports_new_exports_once(tmp_path):
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    export = downloads / 'Chase1234_Activity_20210914.CSV'
+    _write_export(export, _FEE)
+    (downloads / 'notes.txt').write_text('Not a Chase export.\n')
+    watcher = _watcher(tmp_path)
+
+    assert watch.PollResult([], {}) == watcher.poll()
+    assert watch.PollResult([str(export)], {}) == watcher.poll()
+    assert watch.PollResult([], {}) == watcher.poll()
+    assert watch.PollResult([], {}) == _watcher(tmp_path).poll()
+    assert _unindent("""
+        2021-09-14 * "Monthly Service Fee" ""
+          Assets:Checking:Chase  -15.00 USD
+        """) == (tmp_path / 'ledger.beancount').read_text().strip() + '\n'
+
+
+def test_appends_only_new_rows_of_changed_export(tmp_path):
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    export = downloads / 'Chase1234_Activity_20210914.CSV'
+    _write_export(export, _FEE)
+    store = watermarks.WatermarkStore(str(tmp_path / 'watermarks.json'))
+    watcher = _watcher(tmp_path, store)
+    watcher.poll()
+    watcher.poll()
+
+    _write_export(export, _DEPOSIT, _FEE)
+    watcher.poll()
+    assert watch.PollResult([str(export)], {}) == watcher.poll()
+
+    assert (tmp_path / 'watermarks.json').exists()
+    assert _unindent("""
+        2021-09-14 * "Monthly Service Fee" ""
+          Assets:Checking:Chase  -15.00 USD
+
+        2021-09-15 * "Remote Online Deposit" ""
+          Assets:Checking:Chase  100.00 USD
+        """) == (tmp_path / 'ledger.beancount').read_text().strip() + '\n'
+
+
+def test_reports_export_that_fails_until_it_changes(tmp_path):
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    export = downloads / 'Chase1234_Activity_20210914.CSV'
+    _write_export(export, 'DEBIT,09/14/2021,"ATM",-1.00,MYSTERY,1.00,,')
+    watcher = _watcher(tmp_path)
+    watcher.poll()
+
+    assert [str(export)] == list(watcher.poll().failed)
+    assert watch.PollResult([], {}) == watcher.poll()
+
+    _write_export(export, _FEE)
+    watcher.poll()
+    assert watch.PollResult([str(export)], {}) == watcher.poll()
+
+
+def test_waits_for_export_to_stop_changing(tmp_path):
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    export = downloads / 'Chase1234_Activity_20210914.CSV'
+    _write_export(export, _FEE)
+    watcher = _watcher(tmp_path)
+    watcher.poll()
+
+    _write_export(export, _FEE, _DEPOSIT)
+    assert watch.PollResult([], {}) == watcher.poll()
+    assert watch.PollResult([str(export)], {}) == watcher.poll()
+
+
+def test_commits_watermarks_only_after_appending(tmp_path):
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    export = downloads / 'Chase1234_Activity_20210914.CSV'
+    _write_export(export, _FEE)
+    # The ledger cannot be opened for appending while it is a directory.
+    (tmp_path / 'ledger.beancount').mkdir()
+    store = watermarks.WatermarkStore()
+    watcher = _watcher(tmp_path, store)
+    watcher.poll()
+
+    assert [str(export)] == list(watcher.poll().failed)
+    assert store.last_date('Assets:Checking:Chase') is None
+
+    (tmp_path / 'ledger.beancount').rmdir()
+    _write_export(export, _FEE)
+    watcher.poll()
+    assert watch.PollResult([str(export)], {}) == watcher.poll()
+    assert store.last_date('Assets:Checking:Chase') is not None
@@ -0,0 +1,136 @@
+import collections
+import datetime
+import hashlib
+import json
+import os
+
+_FORMAT_VERSION = 1
+
+
+class WatermarkStore:
+    """Remembers which rows of each account have already been imported.
+
+    For each account, the store keeps the latest posting date it has imported
+    and hashes of the rows on that date. Rows dated before the watermark are
+    assumed to be imported already. Rows on the watermark date are compared
+    by hash, because Chase may post more transactions on that day after an
+    export. Rows dated after the watermark are new.
+
+    Extracting rows only marks them as pending. Call commit() once their
+    directives have been written, so that rows whose write failed are
+    extracted again. Until then, later extractions skip the pending rows too,
+    so overlapping exports in one run do not duplicate them.
+
+    The store assumes that imports move forward in time. Importing an older
+    window after a newer one skips the older window's rows.
+    """
+
+    def __init__(self, path=None):
+        """Load a store, starting empty if the path does not exist yet.
+
+        Args:
+            path: JSON file that persists the store. If None, the store is
+                kept in memory only.
+        """
+        self._path = path
+        # The committed watermark of each account.
+        self._accounts = {}
+        # The watermarks of rows extracted since the last commit, by account.
+        self._pending = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._load(json.load(f))
+
+    def _load(self, state):
+        version = state.get('version')
+        if version != _FORMAT_VERSION:
+            raise ValueError(f'unsupported watermark store version: {version}')
+        for account, watermark in state['accounts'].items():
+            self._accounts[account] = (datetime.date.fromisoformat(
+                watermark['last_date']), frozenset(watermark['row_hashes']))
+
+    def save(self):
+        """Write the committed watermarks to the store's file, if it has one."""
+        if not self._path:
+            return
+        state = {
+            'version': _FORMAT_VERSION,
+            'accounts': {
+                account: {
+                    'last_date': last_date.isoformat(),
+                    'row_hashes': sorted(row_hashes),
+                } for account, (last_date, row_hashes) in self._accounts.items()
+            },
+        }
+        temporary_path = f'{self._path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temporary_path, self._path)
+
+    def commit(self):
+        """Record the rows extracted since the last commit, and save."""
+        self._accounts.update(self._pending)
+        self._pending.clear()
+        self.save()
+
+    def discard(self):
+        """Forget the rows extracted since the last commit."""
+        self._pending.clear()
+
+    def last_date(self, account):
+        """Returns the latest committed posting date of an account or None."""
+        watermark = self._accounts.get(account)
+        return watermark[0] if watermark else None
+
+    def new_rows(self, account, indexed_rows, fingerprint):
+        """Filter out rows that were imported or extracted before.
+
+        Once every row has been consumed, the new rows are recorded as
+        pending until commit(). A partially consumed iterator records nothing.
+
+        Args:
+            account: The account the rows belong to.
+            indexed_rows: Iterable of (index, row) pairs from a CSV export.
+            fingerprint: Function that takes a row and returns a tuple of its
+                posting date and a tuple of the raw fields that identify it.
+
+        Yields:
+            The (index, row) pairs that have not been imported yet.
+        """
+        last_date, imported_hashes = self._pending.get(
+            account, self._accounts.get(account, (None, frozenset())))
+        occurrences = collections.Counter()
+        new_hashes = collections.defaultdict(set)
+        for index, row in indexed_rows:
+            date, fields = fingerprint(row)
+            if last_date and date < last_date:
+                continue
+            # Identical rows on the same day are told apart by how many times
+            # they have occurred in the export.
+            occurrences[fields] += 1
+            row_hash = _hash_row(fields, occurrences[fields])
+            if date == last_date and row_hash in imported_hashes:
+                continue
+            new_hashes[date].add(row_hash)
+            yield index, row
+
+        if not new_hashes:
+            return
+        newest_date = max(new_hashes)
+        if newest_date == last_date:
+            row_hashes = imported_hashes.union(new_hashes[newest_date])
+        else:
+            row_hashes = frozenset(new_hashes[newest_date])
+        self._pending[account] = (newest_date, row_hashes)
+
+
+def _hash_row(fields, occurrence):
+    digest = hashlib.sha256()
+    for field in fields:
+        # A column that the export lacks, or that a short row ends before,
+        # reads as None.
+        if field is not None:
+            digest.update(field.encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(str(occurrence).encode('ascii'))
+    return digest.hexdigest()[:32]
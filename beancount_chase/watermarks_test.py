@@ -0,0 +1,81 @@
+import datetime
+
+from . import watermarks
+
+
+def _fingerprint(row):
+    return datetime.date.fromisoformat(row[0]), row
+
+
+def _new_rows(store, rows):
+    new_rows = [
+        row for _, row in store.new_rows('Assets:Checking', enumerate(rows),
+                                         _fingerprint)
+    ]
+    store.commit()
+    return new_rows
+
+
+def test_yields_every_row_of_first_import():
+    store = watermarks.WatermarkStore()
+    rows = [('2024-01-02', 'Coffee'), ('2024-01-01', 'Rent')]
+
+    assert rows == _new_rows(store, rows)
+    assert datetime.date(2024, 1, 2) == store.last_date('Assets:Checking')
+
+
+def test_skips_rows_imported_before():
+    store = watermarks.WatermarkStore()
+    _new_rows(store, [('2024-01-02', 'Coffee'), ('2024-01-01', 'Rent')])
+
+    assert [('2024-01-03', 'Lunch'),
+            ('2024-01-02', 'Tea')] == _new_rows(store,
+                                                [('2024-01-03', 'Lunch'),
+                                                 ('2024-01-02', 'Tea'),
+                                                 ('2024-01-02', 'Coffee'),
+                                                 ('2024-01-01', 'Rent')])
+
+
+def test_tells_identical_rows_apart_by_occurrence():
+    store = watermarks.WatermarkStore()
+    _new_rows(store, [('2024-01-02', 'Coffee')])
+
+    assert [('2024-01-02', 'Coffee')] == _new_rows(store,
+                                                   [('2024-01-02', 'Coffee'),
+                                                    ('2024-01-02', 'Coffee')])
+
+
+def test_records_nothing_until_rows_are_consumed():
+    store = watermarks.WatermarkStore()
+    rows = store.new_rows('Assets:Checking',
+                          enumerate([('2024-01-02', 'Coffee')]), _fingerprint)
+    next(rows)
+
+    assert store.last_date('Assets:Checking') is None
+
+
+def test_records_rows_only_when_committed(tmp_path):
+    path = tmp_path / 'watermarks.json'
+    store = watermarks.WatermarkStore(str(path))
+    rows = [('2024-01-02', 'Coffee')]
+    list(store.new_rows('Assets:Checking', enumerate(rows), _fingerprint))
+
+    assert store.last_date('Assets:Checking') is None
+    assert not path.exists()
+    assert not list(
+        store.new_rows('Assets:Checking', enumerate(rows), _fingerprint))
+
+    store.discard()
+    assert rows == _new_rows(store, rows)
+    assert datetime.date(2024, 1, 2) == store.last_date('Assets:Checking')
+    assert path.exists()
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / 'watermarks.json')
+    _new_rows(watermarks.WatermarkStore(path), [('2024-01-02', 'Coffee')])
+
+    store = watermarks.WatermarkStore(path)
+    assert datetime.date(2024, 1, 2) == store.last_date('Assets:Checking')
+    assert [] == _new_rows(store, [('2024-01-02', 'Coffee')])
+    assert store.last_date('Assets:Savings') is None
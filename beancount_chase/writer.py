@@ -0,0 +1,157 @@
+import decimal
+
+from beancount.core import amount
+from beancount.core import data
+from beancount.ingest import extract
+from beancount.parser import printer
+
+# Number of directives whose text is joined into each write.
+_ENTRIES_PER_WRITE = 512
+
+# Metadata that beancount's printer leaves out.
+_HIDDEN_META = frozenset(printer.EntryPrinter.META_IGNORE)
+
+
+def write_entries(entries, file, *, padded=True):
+    """Write directives as beancount text, like print_extracted_entries.
+
+    The output is identical to beancount.ingest.extract's
+    print_extracted_entries. Transactions and balance assertions of the
+    shapes that the Chase importers produce are formatted directly, and any
+    other directive is formatted by beancount's printer.
+
+    Args:
+        entries: An iterable of directives, which is consumed as it is
+            written.
+        file: A text stream to write to.
+        padded: Whether to add the blank lines that print_extracted_entries
+            writes before and after the directives. Without them, each
+            directive is followed by one blank line, so that directives
+            appended to the same file in several writes stay one blank line
+            apart.
+    """
+    chunk = ['\n'] if padded else []
+    for entry in entries:
+        chunk.append(format_entry(entry))
+        chunk.append('\n')
+        if len(chunk) >= 2 * _ENTRIES_PER_WRITE:
+            file.write(''.join(chunk))
+            chunk.clear()
+    if padded:
+        chunk.append('\n')
+    file.write(''.join(chunk))
+
+
+def format_entry(entry):
+    """Format one directive as print_extracted_entries would.
+
+    Args:
+        entry: A directive.
+
+    Returns:
+        The directive's text, ending in a newline.
+    """
+    text = None
+    if extract.DUPLICATE_META not in entry.meta:
+        if isinstance(entry, data.Transaction):  # pylint: disable=isinstance-second-argument-not-valid-type
+            text = _format_transaction(entry)
+        elif isinstance(entry, data.Balance):  # pylint: disable=isinstance-second-argument-not-valid-type
+            text = _format_balance(entry)
+    if text is None:
+        text = _format_with_printer(entry)
+    return text
+
+
+def _format_with_printer(entry):
+    # The fallback for anything the fast paths do not handle, written the way
+    # print_extracted_entries writes it.
+    if extract.DUPLICATE_META not in entry.meta:
+        return printer.format_entry(entry)
+    meta = entry.meta.copy()
+    meta.pop(extract.DUPLICATE_META)
+    text = printer.format_entry(entry._replace(meta=meta))
+    return ''.join(
+        f'; {line}' if line.strip() else line for line in text.splitlines(True))
+
+
+def _format_transaction(entry):
+    """Returns a transaction's text, or None if it needs the printer."""
+    if not _HIDDEN_META.issuperset(entry.meta):
+        return None
+    accounts = []
+    numbers = []
+    currencies = []
+    for posting in entry.postings:
+        if posting.cost is not None or posting.price is not None:
+            return None
+        if posting.meta:
+            return None
+        number = _format_units(posting.units)
+        if number is None:
+            return None
+        flag = f'{posting.flag} ' if posting.flag else ''
+        accounts.append(flag + posting.account)
+        numbers.append(number)
+        currencies.append(posting.units.currency)
+
+    words = []
+    if entry.payee:
+        words.append(_quote(entry.payee))
+    if entry.narration:
+        words.append(_quote(entry.narration))
+    elif entry.payee:
+        words.append('""')
+    words.extend(f'#{tag}' for tag in sorted(entry.tags or ()))
+    words.extend(f'^{link}' for link in sorted(entry.links or ()))
+    header = ' '.join(words)
+    lines = [f'{entry.date} {entry.flag} {header}\n']
+
+    if accounts:
+        # Like the printer, align the numbers on the first letter of their
+        # currencies.
+        account_width = max(map(len, accounts))
+        number_width = max(map(len, numbers)) + 1
+        currency_width = max(map(len, currencies))
+        for account, number, currency in zip(accounts, numbers, currencies):
+            line = (f'  {account:{account_width}}  '
+                    f'{number:>{number_width - 1}} '
+                    f'{currency:{currency_width}}')
+            lines.append(f'{line.rstrip()}\n')
+    return ''.join(lines)
+
+
+def _format_balance(entry):
+    """Returns a balance assertion's text, or None if it needs the printer."""
+    if entry.tolerance or entry.diff_amount:
+        return None
+    if not _HIDDEN_META.issuperset(entry.meta):
+        return None
+    number = _format_units(entry.amount)
+    if number is None:
+        return None
+    return (f'{entry.date} balance {entry.account:47} {number} '
+            f'{entry.amount.currency}\n')
+
+
+def _format_units(units):
+    """Returns the printer's text for an Amount's number, or None.
+
+    None means the printer must format the amount, because its number is
+    missing or not finite, or its currency would not align on its first
+    character.
+    """
+    if not isinstance(units, amount.Amount):
+        return None
+    number = units.number
+    currency = units.currency
+    if not isinstance(number, decimal.Decimal) or not number.is_finite():
+        return None
+    if not currency or not 'A' <= currency[0] <= 'Z':
+        return None
+    # Beancount's default display context renders numbers as they are.
+    return format(number, 'f')
+
+
+def _quote(text):
+    escaped = text.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
@@ -0,0 +1,106 @@
+import datetime
+import io
+
+from beancount.core import amount
+from beancount.core import data
+from beancount.core import number
+from beancount.core import position
+from beancount.ingest import extract
+
+from . import writer
+
+
+def _posting(account, units, currency='USD', **kwargs):
+    return data.Posting(account=account,
+                        units=amount.Amount(number.D(units), currency),
+                        cost=kwargs.get('cost'),
+                        price=kwargs.get('price'),
+                        flag=kwargs.get('flag'),
+                        meta=kwargs.get('meta'))
+
+
+def _transaction(*postings, meta=None, **kwargs):
+    return data.Transaction(meta=data.new_metadata('export.csv', 1, meta),
+                            date=datetime.date(2021, 11, 6),
+                            flag=kwargs.get('flag', '*'),
+                            payee=kwargs.get('payee'),
+                            narration=kwargs.get('narration', 'Github'),
+                            tags=kwargs.get('tags', data.EMPTY_SET),
+                            links=kwargs.get('links', data.EMPTY_SET),
+                            postings=list(postings))
+
+
+def _balance(units, **kwargs):
+    return data.Balance(meta=data.new_metadata('export.csv', 2),
+                        date=datetime.date(2021, 11, 7),
+                        account='Assets:Checking:Chase',
+                        amount=amount.Amount(number.D(units), 'USD'),
+                        tolerance=kwargs.get('tolerance'),
+                        diff_amount=None)
+
+
+def _assert_same_as_printer(entries):
+    expected = io.StringIO()
+    extract.print_extracted_entries(entries, expected)
+    actual = io.StringIO()
+    writer.write_entries(iter(entries), actual)
+    assert expected.getvalue() == actual.getvalue()
+
+
+def test_writes_importer_shapes_like_printer():
+    _assert_same_as_printer([
+        _transaction(_posting('Liabilities:Credit-Cards:Chase', '-25.35')),
+        _transaction(_posting('Assets:Checking:Chase', '-1000000.00'),
+                     _posting('Expenses:Rent', '1000000.00'),
+                     payee='Landlord "Big" \\ Co',
+                     narration=None),
+        _transaction(_posting('Assets:Checking:Chase', '-4.5'),
+                     _posting('Expenses:Github', '4.50', 'USDX'),
+                     payee='Github',
+                     tags=frozenset(['b', 'a']),
+                     links=frozenset(['transfer-1'])),
+        _transaction(_posting('Assets:Checking:Chase', '1E+2', flag='!'),
+                     _posting('Income:Misc', '-100'),
+                     narration='',
+                     flag='!'),
+        _transaction(narration=None),
+        _balance('4325.75'),
+        _balance('-0.00'),
+    ])
+
+
+def test_writes_other_shapes_with_printer():
+    _assert_same_as_printer([
+        _transaction(_posting('Assets:Checking:Chase', '-10.00'),
+                     meta={'category': 'Shopping'}),
+        _transaction(
+            _posting('Assets:Checking:Chase', '-10.00', meta={'note': 'x'})),
+        _transaction(
+            _posting('Assets:Brokerage',
+                     '2',
+                     'HOOL',
+                     cost=position.Cost(number.D('500.00'), 'USD', None, None)),
+            _posting('Assets:Checking:Chase',
+                     '-1000.00',
+                     price=amount.Amount(number.D('1'), 'USD'))),
+        _transaction(_posting('Assets:Checking:Chase', '-10.00'),
+                     meta={extract.DUPLICATE_META: True}),
+        _balance('4325.75', tolerance=number.D('0.01')),
+        data.Open(data.new_metadata('export.csv', 3), datetime.date(2021, 1, 1),
+                  'Assets:Checking:Chase', ['USD'], None),
+    ])
+
+
+def test_writes_nothing_but_blank_lines_without_entries():
+    _assert_same_as_printer([])
+
+
+def test_separates_appended_writes_by_one_blank_line():
+    first = _balance('1.00')
+    second = _balance('2.00')
+    output = io.StringIO()
+    writer.write_entries([first], output, padded=False)
+    writer.write_entries([second], output, padded=False)
+
+    assert (f'{writer.format_entry(first)}\n'
+            f'{writer.format_entry(second)}\n') == output.getvalue()
@@ -0,0 +1,109 @@
+"""Measure how long importing and configuring the importers takes.
+
+Usage:
+    python -m benchmarks.import_time --repeat 20 --output import.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+
+_DEFAULT_REPEAT = 20
+
+# Bean tools import beancount.ingest before loading a config, so the cases
+# that model a config preload it and only time what this package adds.
+_PRELOAD = 'import beancount.ingest.importer, beancount.core.data'
+
+_CONFIG = """
+import beancount_chase
+CONFIG = [
+    beancount_chase.CheckingImporter('Assets:Checking:Chase', lastfour='1234',
+        account_patterns=[('GITHUB', 'Expenses:Github')]),
+    beancount_chase.CreditImporter('Liabilities:Credit-Cards:Chase',
+        lastfour='5678', account_patterns=[('Fedex', 'Expenses:FedEx')]),
+]
+"""
+
+# (name, code run before the timer starts, timed code)
+_CASES = [
+    ('import package', '', 'import beancount_chase'),
+    ('import importers', _PRELOAD,
+     'from beancount_chase import CheckingImporter, CreditImporter'),
+    ('load config', _PRELOAD, _CONFIG),
+]
+
+_SCRIPT = """
+import time
+{setup}
+start = time.perf_counter()
+exec({code!r})
+print(time.perf_counter() - start)
+"""
+
+
+def _time_case(setup, code):
+    """Run code once in a fresh interpreter and return its seconds."""
+    output = subprocess.run(
+        [sys.executable, '-c',
+         _SCRIPT.format(setup=setup, code=code)],
+        check=True,
+        capture_output=True,
+        text=True).stdout
+    return float(output)
+
+
+def run(repeat):
+    """Time every case in repeat fresh interpreters.
+
+    Args:
+        repeat: How many interpreters to time each case in.
+
+    Returns:
+        A dict describing the environment and each case's median and fastest
+        times.
+    """
+    results = []
+    for name, setup, code in _CASES:
+        times = [_time_case(setup, code) for _ in range(repeat)]
+        results.append({
+            'case': name,
+            'median_seconds': statistics.median(times),
+            'min_seconds': min(times),
+        })
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def _print_report(report):
+    print(f'{"case":<18}{"median":>10}{"min":>10}')
+    for result in report['results']:
+        print(f'{result["case"]:<18}'
+              f'{result["median_seconds"] * 1000:>8.1f}ms'
+              f'{result["min_seconds"] * 1000:>8.1f}ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=_DEFAULT_REPEAT,
+                        help='fresh interpreters to time each case in')
+    parser.add_argument('--output',
+                        help='write results as JSON to this path for later '
+                        'comparison')
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat)
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
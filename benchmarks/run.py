@@ -0,0 +1,159 @@
+"""Measure importer throughput on synthetic Chase exports.
+
+Usage:
+    python -m benchmarks.run --rows 1000 100000 --output results.json
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+from beancount.ingest import cache as ingest_cache
+
+import beancount_chase
+from benchmarks import synthetic
+
+_DEFAULT_ROWS = [1000, 100000]
+
+_ACCOUNT_PATTERNS = [
+    ('GITHUB', 'Expenses:Cloud-Services:Source-Hosting:Github'),
+    ('Fedex', 'Expenses:Postage:FedEx'),
+    ('^AMAZON WEB SERVICES$', 'Expenses:Cloud-Services:AWS'),
+    ('Google.*Cloud', 'Expenses:Cloud-Services:Google-Cloud-Platform'),
+    ('Schwab', 'Assets:Investments:Schwab'),
+    ('Payment Thank You', 'Assets:Checking:Chase'),
+    ('CHASE CREDIT CRD', 'Liabilities:Credit-Cards:Chase'),
+]
+
+_KINDS = {
+    'checking':
+        ('Chase1234_Activity_20240101.CSV', synthetic.write_checking_csv,
+         beancount_chase.CheckingImporter, 'Assets:Checking:Chase'),
+    'credit': ('Chase1234_Activity20240101_20240201_20240214.CSV',
+               synthetic.write_credit_csv, beancount_chase.CreditImporter,
+               'Liabilities:Credit-Cards:Chase'),
+}
+
+
+def _make_importer(kind):
+    _, _, importer_class, account = _KINDS[kind]
+    return importer_class(account,
+                          lastfour='1234',
+                          account_patterns=_ACCOUNT_PATTERNS)
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def _run_case(kind, rows, directory):
+    """Benchmark one importer on one file in a fresh process.
+
+    Running each case in its own process keeps caches cold and makes the
+    process's peak RSS attributable to that case alone.
+    """
+    filename, write_csv, _, _ = _KINDS[kind]
+    # The importers identify files by name, so each case gets its own
+    # directory to keep the expected filename.
+    case_directory = os.path.join(directory, f'{kind}-{rows}')
+    os.makedirs(case_directory)
+    path = os.path.join(case_directory, filename)
+    write_csv(path, rows)
+    f = ingest_cache.get_file(path)
+
+    stages = {}
+    importer = _make_importer(kind)
+    identified, stages['identify'] = _timed(importer.identify, f)
+    _, stages['file_date_cold'] = _timed(importer.file_date, f)
+    directives, stages['extract'] = _timed(importer.extract, f)
+    _, stages['file_date_warm'] = _timed(importer.file_date, f)
+    _, stages['extract_iter'] = _timed(
+        lambda: sum(1 for _ in _make_importer(kind).extract_iter(f)))
+
+    os.remove(path)
+    return {
+        'kind': kind,
+        'rows': rows,
+        'identified': identified,
+        'directives': len(directives),
+        'rows_per_sec': rows / stages['extract'],
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'seconds': stages,
+    }
+
+
+def run(rows_list, kinds):
+    """Run every benchmark case, each in a fresh worker process.
+
+    Args:
+        rows_list: Row counts of the synthetic files to generate.
+        kinds: Importer kinds to benchmark, 'checking' and/or 'credit'.
+
+    Returns:
+        A dict describing the environment and each case's measurements.
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in kinds:
+            for rows in rows_list:
+                with concurrent.futures.ProcessPoolExecutor(
+                        max_workers=1, mp_context=context) as executor:
+                    results.append(
+                        executor.submit(_run_case, kind, rows,
+                                        directory).result())
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def _print_report(report):
+    print(f'{"kind":<9}{"rows":>9}{"rows/sec":>12}{"peak RSS":>12}'
+          f'{"identify":>11}{"date cold":>11}{"extract":>10}'
+          f'{"date warm":>11}{"iter":>9}')
+    for result in report['results']:
+        seconds = result['seconds']
+        print(f'{result["kind"]:<9}{result["rows"]:>9}'
+              f'{result["rows_per_sec"]:>12,.0f}'
+              f'{result["peak_rss_kb"] / 1024:>10.1f}MB'
+              f'{seconds["identify"]:>11.5f}{seconds["file_date_cold"]:>11.3f}'
+              f'{seconds["extract"]:>10.3f}{seconds["file_date_warm"]:>11.3f}'
+              f'{seconds["extract_iter"]:>9.3f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows',
+                        type=int,
+                        nargs='+',
+                        default=_DEFAULT_ROWS,
+                        help='row counts to generate, e.g. 1000 100000 1000000')
+    parser.add_argument('--kind',
+                        choices=sorted(_KINDS),
+                        nargs='+',
+                        default=sorted(_KINDS),
+                        help='importers to benchmark')
+    parser.add_argument('--output',
+                        help='write results as JSON to this path for later '
+                        'comparison')
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.kind)
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+import csv
+import datetime
+import random
+
+CHECKING_HEADER = [
+    'Details', 'Posting Date', 'Description', 'Amount', 'Type', 'Balance',
+    'Check or Slip #'
+]
+
+CREDIT_HEADER = [
+    'Card', 'Transaction Date', 'Post Date', 'Description', 'Category', 'Type',
+    'Amount', 'Memo'
+]
+
+_MERCHANTS = [
+    'Spotify', 'AMZN Mktp US', 'GITHUB', 'FEDEX OFFICE 1234', 'Starbucks 0412',
+    'GOOGLE *CLOUD_02BB66-C', 'UBER   *TRIP', 'WHOLEFDS BRK 10234',
+    'AMAZON WEB SERVICES', 'DIGITALOCEAN.COM', 'SHELL OIL 5744',
+    'COSTCO WHSE #0123'
+]
+
+_COMPANIES = [
+    'gumroad.com', 'STRIPE', 'CHASE CREDIT CRD', 'IRS', 'ADP PAYROLL', 'PAYPAL'
+]
+
+_CATEGORIES = [
+    'Shopping', 'Professional Services', 'Food & Drink', 'Travel', 'Gas',
+    'Groceries', 'Bills & Utilities'
+]
+
+
+def _full_ach(rng):
+    company = rng.choice(_COMPANIES)
+    return (f'ORIG CO NAME:{company:<20} ORIG ID:{rng.randrange(10**10)} '
+            f'DESC DATE:       CO ENTRY DESCR:TRANSFER  SEC:CCD    '
+            f'TRACE#:{rng.randrange(10**15)} EED:{rng.randrange(10**6)}   '
+            f'IND ID:ST-{rng.randrange(10**12)}              '
+            f'IND NAME:MICHAEL CUSTOMER TRN: {rng.randrange(10**10)}TC',
+            'ACH_CREDIT')
+
+
+def _simple_ach(rng):
+    company = rng.choice(_COMPANIES)
+    return (f'ORIG CO NAME:{company}           CO ENTRY DESCR:PAYMENT   '
+            f'SEC:CCD IND ID:ST-{rng.randrange(10**12)} '
+            f'ORIG ID:{rng.randrange(10**10)}', 'ACH_DEBIT')
+
+
+def _outbound_transfer(rng):
+    number = rng.randrange(10**10, 10**11)
+    return (f'Online Transfer {number} to Schwab Personal Checking '
+            f'########9876 transaction #: {number} 09/13', 'ACCT_XFER')
+
+
+def _inbound_transfer(rng):
+    number = rng.randrange(10**10, 10**11)
+    return (f'Online Transfer {number} from Schwab Personal Checking '
+            f'########9876 transaction #: {number} 09/13', 'ACCT_XFER')
+
+
+def _ach_payment(rng):
+    kind = rng.choice(['Same-Day', 'Online'])
+    payee = rng.choice(['JoeExample', 'JaneExample'])
+    return (f'{kind} ACH Payment {rng.randrange(10**11)} to {payee} '
+            '(_######9587)', 'ACH_PAYMENT')
+
+
+def _debit_card(rng):
+    return rng.choice(_MERCHANTS), 'DEBIT_CARD'
+
+
+def _wire(_):
+    return ('ONLINE INTERNATIONAL WIRE TRANSFER A/C: FOREIGN CUR BUS ACCT BK 1 '
+            'COLUMBUS NEWARK DE 197132352 US REF: SUPPLY ORDER',
+            'WIRE_OUTGOING')
+
+
+def _deposit(_):
+    return 'Cash Redemption', 'DEPOSIT'
+
+
+def _fee(rng):
+    return rng.choice([
+        'STANDARD ACH PMNTS INITIAL FEE',
+        'MONTHLY SERVICE FEE',
+        'RTP/Same Day - Low Value',
+        'ONLINE FX INTERNATIONAL WIRE FEE',
+    ]), 'FEE_TRANSACTION'
+
+
+def _fee_reversal(rng):
+    return rng.choice([
+        'FEE REVERSAL',
+        'Monthly Service Fee Reversal January 2024',
+    ]), 'REFUND_TRANSACTION'
+
+
+# Every shape of row the checking importer's _TRANSACTION_PATTERNS knows,
+# weighted roughly by how often each shows up in a business account.
+_CHECKING_SHAPES = [
+    (_debit_card, 40),
+    (_full_ach, 12),
+    (_simple_ach, 12),
+    (_outbound_transfer, 8),
+    (_inbound_transfer, 8),
+    (_ach_payment, 8),
+    (_fee, 6),
+    (_fee_reversal, 2),
+    (_wire, 2),
+    (_deposit, 2),
+]
+
+
+def _dates(rng, rows, start):
+    """Yield dates in newest-first order, as Chase exports them."""
+    date = start + datetime.timedelta(days=rows // 20 + 1)
+    for _ in range(rows):
+        if rng.random() < 0.05:
+            date -= datetime.timedelta(days=1)
+        yield date.strftime('%m/%d/%Y')
+
+
+def _amount(rng):
+    # About one row in a hundred has a zero amount, which importers drop.
+    if rng.random() < 0.01:
+        return '0.00'
+    return f'{rng.randrange(1, 500000) / 100:.2f}'
+
+
+def write_checking_csv(path, rows, seed=0):
+    """Write a synthetic Chase checking export.
+
+    Args:
+        path: Path of the CSV file to write.
+        rows: Number of transaction rows to write.
+        seed: Seed for the random generator, so runs are reproducible.
+    """
+    rng = random.Random(seed)
+    shapes, weights = zip(*_CHECKING_SHAPES)
+    balance = 10000.0
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(CHECKING_HEADER)
+        for date in _dates(rng, rows, datetime.date(2020, 1, 1)):
+            description, transaction_type = rng.choices(shapes, weights)[0](rng)
+            amount = _amount(rng)
+            if transaction_type not in ('ACH_CREDIT', 'DEPOSIT'):
+                amount = f'-{amount}'
+            details = 'CREDIT' if not amount.startswith('-') else 'DEBIT'
+            balance -= float(amount)
+            writer.writerow([
+                details, date, description, amount, transaction_type,
+                f'{balance:.2f}', '', ''
+            ])
+
+
+def write_credit_csv(path, rows, seed=0):
+    """Write a synthetic Chase credit card export.
+
+    Args:
+        path: Path of the CSV file to write.
+        rows: Number of transaction rows to write.
+        seed: Seed for the random generator, so runs are reproducible.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(CREDIT_HEADER)
+        for date in _dates(rng, rows, datetime.date(2020, 1, 1)):
+            kind = rng.choices(['Sale', 'Return', 'Payment'], [90, 5, 5])[0]
+            amount = _amount(rng)
+            if kind == 'Sale':
+                description = rng.choice(_MERCHANTS)
+                category = rng.choice(_CATEGORIES)
+                amount = f'-{amount}'
+            elif kind == 'Return':
+                description = rng.choice(_MERCHANTS)
+                category = rng.choice(_CATEGORIES)
+            else:
+                description = 'Payment Thank You - Web'
+                category = ''
+            writer.writerow(
+                ['1234', date, date, description, category, kind, amount, ''])